@@ -1,46 +1,38 @@
 ﻿import cv2
 import time
-import pyttsx3
-import mediapipe as mp
-from mediapipe.tasks.python import vision
-from mediapipe.tasks.python.core.base_options import BaseOptions
-
-
-# ---------------- Allowed Library ---------------- #
-LIBRARY = set([
-    *[str(i) for i in range(11)],
-    *[chr(i) for i in range(65, 91)],
-    "APPLE","BANANA","PINEAPPLE","MANGO","GRAPES","ORANGE","WATERMELON","STRAWBERRY",
-    "EGGPLANT","CARROT","CABBAGE","PUMPKIN","GARLIC","ONION","RADISH","BELL PEPPER","CUCUMBER","LETTUCE",
-    "CAT","DOG","COW","FISH","SHARK","CHICKEN","DUCK","SHEEP","HORSE","PIG",
-    "PENCIL","NOTEBOOK","CHALK","ERASER","CHAIR","PHONE","PEN","BAG","BOOK","PERSON"
-])
+from classification import make_classifier, categories
+from batching import MicroBatcher, classify_batch
+from burst import best_frames
+from frame_grabber import FrameGrabber
+from frame_source import open_source
+from speech_service import SpeechService
+
 
 # ---------------- Text-to-Speech ---------------- #
-engine = pyttsx3.init()
-def speak(text):
-    engine.say(text)
-    engine.runAndWait()
+speech = SpeechService()
+speech.start()
 
 # ---------------- MediaPipe Classifier ---------------- #
-options = vision.ImageClassifierOptions(
-    base_options=BaseOptions(model_asset_path="mobilenet_v1_1.0_224.tflite"),
-    max_results=5,
-    score_threshold=0.05
-)
+classifier = make_classifier()
+# The sharpest few frames of each burst are classified as one batch and
+# the most confident result wins
+BURST_KEEP = 3
+batcher = MicroBatcher(classify_batch(classifier), max_batch=BURST_KEEP,
+                       name="classify").start()
+
 
-classifier = vision.ImageClassifier.create_from_options(options)
+def top_score(result):
+    return max((score for _, score, _ in categories(result)), default=0.0)
 
 
 # ---------------- Camera ---------------- #
-cap = cv2.VideoCapture(0)
-cap.set(3, 640)
-cap.set(4, 480)
+cap = open_source(width=640, height=480)
+grabber = FrameGrabber(cap).start()
 
 print("Press SPACE to capture | ESC to exit")
 
 while True:
-    ret, frame = cap.read()
+    ret, frame = grabber.read()
     if not ret:
         break
 
@@ -51,40 +43,41 @@ while True:
         break
 
     if key == 32:
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb)
-
-        result = classifier.classify(mp_image)
+        # Sharpest frames of a short burst, as private copies we can annotate
+        frames = best_frames(grabber, keep=BURST_KEEP)
+        if not frames:
+            continue
+        results = batcher.map(frames)
+        frame, result = max(zip(frames, results), key=lambda fr: top_score(fr[1]))
 
         y = 40
         detected = []
 
-        if result.classifications:
-            for c in result.classifications[0].categories:
-                label = c.category_name.upper()
-                score = c.score
-
-                print(label, score)
-
-                if label in LIBRARY:
-                    detected.append(label)
-                    cv2.putText(
-                        frame,
-                        f"{label} ({score:.2f})",
-                        (10, y),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        1,
-                        (0, 255, 0),
-                        2
-                    )
-                    y += 35
+        for label, score, allowed in categories(result):
+            print(label, score)
+
+            if allowed:
+                detected.append(label)
+                cv2.putText(
+                    frame,
+                    f"{label} ({score:.2f})",
+                    (10, y),
+                    cv2.FONT_HERSHEY_SIMPLEX,
+                    1,
+                    (0, 255, 0),
+                    2
+                )
+                y += 35
 
         cv2.imshow("Result", frame)
 
         if detected:
-            speak(", ".join(detected))
+            speech.say(", ".join(detected))
 
         time.sleep(0.5)
 
+batcher.stop()
+speech.stop()
+grabber.stop()
 cap.release()
 cv2.destroyAllWindows()
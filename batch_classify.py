@@ -0,0 +1,232 @@
+import argparse
+import itertools
+import json
+import os
+import time
+from multiprocessing import Pool
+
+import cv2
+
+from classification import MODEL_PATH
+from results import DetectionResult
+
+# ================= BATCH CLASSIFY =================
+# Headless bulk labeling over an image directory or a video file:
+#
+#   python batch_classify.py archive/ -o labels.jsonl --workers 4
+#   python batch_classify.py clip.mp4 -o clip.jsonl --every 15 --yolo --ocr
+#
+# Each worker process loads its own MediaPipe classifier (and optionally
+# YOLO / EasyOCR) once. Results are appended to the JSONL output as they
+# complete; re-running the same command skips everything already in the
+# output, so an interrupted run resumes where it stopped.
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+VIDEO_EXTS = (".mp4", ".avi", ".mov", ".mkv", ".webm")
+
+# Worker-process globals, set up once by init_worker()
+classifier = None
+detector = None
+ocr_reader = None
+
+
+# ================= WORKER =================
+def init_worker(model_path, use_yolo, use_ocr, threads):
+    global classifier, detector, ocr_reader
+
+    # One model instance per process: keep each to its share of the CPU
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    cv2.setNumThreads(threads)
+
+    from classification import make_classifier
+    # Keep every category for the archive, not just the LIBRARY ones
+    classifier = make_classifier(model_path, allowed_only=False)
+
+    if use_yolo or use_ocr:
+        import torch
+        torch.set_num_threads(threads)
+    if use_yolo:
+        from detector_backends import make_detector
+        detector = make_detector(threads=threads)
+    if use_ocr:
+        import easyocr
+        ocr_reader = easyocr.Reader(['en'], gpu=False)
+
+
+def process_items(items):
+    # A group of items per task: YOLO runs once on the whole group, the
+    # classifier and OCR frame by frame
+    frames = [cv2.imread(p) if isinstance(p, str) else p for _, p in items]
+    readable = [f for f in frames if f is not None]
+
+    dets = iter(())
+    yolo_share = 0.0
+    if detector is not None and readable:
+        start = time.perf_counter()
+        dets = iter(detector.batch(readable))
+        yolo_share = (time.perf_counter() - start) / len(readable)
+
+    records = []
+    for (key, _), frame in zip(items, frames):
+        if frame is None:
+            records.append({"source": key, "error": "unreadable"})
+        else:
+            records.append(process_frame(key, frame, next(dets, None), yolo_share))
+    return records
+
+
+def process_frame(key, frame, dets, yolo_time):
+    from classification import to_mp_image, categories
+
+    h, w = frame.shape[:2]
+    start = time.perf_counter()
+    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    found = categories(classifier.classify(to_mp_image(rgb)))
+    parts = [DetectionResult.from_categories(found, (w, h))]
+
+    if dets is not None:
+        parts.append(DetectionResult.from_yolo(dets, (w, h)))
+
+    if ocr_reader is not None:
+        from text_regions import read_text
+        parts.append(DetectionResult.from_ocr(read_text(ocr_reader, frame),
+                                              (w, h), min_conf=0.4))
+
+    result = DetectionResult.merge("+".join(r.backend for r in parts), parts)
+    # This frame's share of the batched YOLO time included
+    result.latency = time.perf_counter() - start + yolo_time
+
+    # One DetectionResult.to_dict() per line, plus the source and the
+    # categories that are in LIBRARY
+    return {
+        "source": key,
+        **result.to_dict(),
+        "allowed": [label for label, _, allowed in found if allowed],
+    }
+
+
+# ================= INPUTS =================
+def iter_images(root):
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.lower().endswith(IMAGE_EXTS):
+                path = os.path.join(dirpath, name)
+                yield os.path.relpath(path, root), path
+
+
+def iter_video(path, every, done):
+    cap = cv2.VideoCapture(path)
+    index = 0
+    try:
+        while True:
+            # grab() skips decoding frames we don't need
+            if not cap.grab():
+                break
+            key = f"{os.path.basename(path)}#{index}"
+            if index % every == 0 and key not in done:
+                ok, frame = cap.retrieve()
+                if ok:
+                    yield key, frame
+            index += 1
+    finally:
+        cap.release()
+
+
+# ================= CHECKPOINT =================
+def load_done(output):
+    # The output file doubles as the checkpoint: every complete line is a
+    # finished item. A torn last line from a crash is ignored.
+    done = set()
+    if not os.path.exists(output):
+        return done
+    with open(output) as f:
+        for line in f:
+            try:
+                done.add(json.loads(line)["source"])
+            except (ValueError, KeyError):
+                continue
+    return done
+
+
+def drop_torn_tail(output, block=1 << 16):
+    # A run killed mid-write leaves a partial last line. Cut the file back
+    # to its last newline so the next record starts on a line of its own
+    if not os.path.exists(output):
+        return
+    with open(output, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        pos = end
+        while pos > 0:
+            start = max(0, pos - block)
+            f.seek(start)
+            data = f.read(pos - start)
+            i = data.rfind(b"\n")
+            if i >= 0:
+                f.truncate(start + i + 1)
+                return
+            pos = start
+        f.truncate(0)
+
+
+# ================= MAIN =================
+def main():
+    parser = argparse.ArgumentParser(description="Bulk image / video classification")
+    parser.add_argument("input", help="image directory or video file")
+    parser.add_argument("-o", "--output", default="labels.jsonl")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--threads", type=int, default=1,
+                        help="inference threads per worker")
+    parser.add_argument("--every", type=int, default=1,
+                        help="video: classify every Nth frame")
+    parser.add_argument("--yolo", action="store_true", help="also run YOLO")
+    parser.add_argument("--batch", type=int, default=4,
+                        help="frames per YOLO batch call (see batching.py)")
+    parser.add_argument("--ocr", action="store_true", help="also run EasyOCR")
+    parser.add_argument("--overwrite", action="store_true",
+                        help="ignore existing output instead of resuming")
+    args = parser.parse_args()
+
+    if args.overwrite and os.path.exists(args.output):
+        os.remove(args.output)
+    drop_torn_tail(args.output)
+    done = load_done(args.output)
+    if done:
+        print(f"Resuming: {len(done)} items already in {args.output}")
+
+    if os.path.isdir(args.input):
+        items = ((k, p) for k, p in iter_images(args.input) if k not in done)
+    elif args.input.lower().endswith(VIDEO_EXTS):
+        items = iter_video(args.input, max(1, args.every), done)
+    else:
+        raise SystemExit(f"Not a directory or video file: {args.input}")
+
+    # Pool.imap drains its input eagerly, so feed it bounded chunks to keep
+    # decoded video frames from piling up in memory
+    group = max(1, args.batch)
+    chunk = args.workers * 8 * group
+    count = 0
+    start = time.perf_counter()
+
+    with Pool(args.workers, initializer=init_worker,
+              initargs=(args.model, args.yolo, args.ocr, args.threads)) as pool, \
+            open(args.output, "a") as out:
+        while True:
+            batch = list(itertools.islice(items, chunk))
+            if not batch:
+                break
+            groups = [batch[i:i + group] for i in range(0, len(batch), group)]
+            for records in pool.imap_unordered(process_items, groups):
+                for record in records:
+                    out.write(json.dumps(record) + "\n")
+                count += len(records)
+            out.flush()
+            rate = count / (time.perf_counter() - start)
+            print(f"\r{count} done ({rate:.1f}/s)", end="", flush=True)
+
+    print(f"\nWrote {count} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
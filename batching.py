@@ -0,0 +1,201 @@
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+from metrics import metrics
+
+
+# ================= MICRO-BATCHING =================
+# Collects frames from any number of callers and runs them through a
+# batch-capable model in groups. A batch goes out as soon as it holds
+# `max_batch` frames, or `max_delay` seconds after its first frame
+# arrived, whichever comes first:
+#
+#   batcher = MicroBatcher(detector.batch, max_batch=8, max_delay=0.02).start()
+#   future = batcher.submit(frame)          # one frame, result later
+#   results = batcher.map(frames)           # many frames, results in order
+#
+# infer_batch(frames) must return one result per frame, in order. If it
+# raises, every frame in that batch gets the exception; if it returns too
+# few results, the frames left without one get a RuntimeError.
+#
+# Users: detection.run_yolo() (CAPTURE and live tracking share one YOLO)
+# and the burst classification in ImageCaptureClassify.py.
+class MicroBatcher:
+    def __init__(self, infer_batch, max_batch=8, max_delay=0.02, name="batch",
+                 timer=None):
+        self.infer_batch = infer_batch
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.name = name
+        # Stage name for the inference time, e.g. "yolo"
+        self.timer = timer or f"{name}_infer"
+
+        self.cond = threading.Condition()
+        self.pending = []    # (frame, future)
+        self.first_time = None
+        self.batches = 0
+        self.frames = 0
+        self.running = False
+        self.thread = None
+
+    # ---------- lifecycle ----------
+    def start(self):
+        # Safe to call from several threads; only the first starts the worker
+        with self.cond:
+            if self.running:
+                return self
+            self.running = True
+            self.thread = threading.Thread(target=self._run, name=self.name,
+                                           daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        # Frames already submitted are still processed
+        with self.cond:
+            self.running = False
+            self.cond.notify()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    # ---------- public ----------
+    def submit(self, frame):
+        future = Future()
+        with self.cond:
+            if not self.running:
+                raise RuntimeError(f"{self.name} batcher is not running")
+            if not self.pending:
+                self.first_time = time.perf_counter()
+            self.pending.append((frame, future))
+            self.cond.notify()
+        return future
+
+    def map(self, frames, timeout=None):
+        futures = [self.submit(frame) for frame in frames]
+        return [f.result(timeout) for f in futures]
+
+    # ---------- worker ----------
+    def _take(self):
+        # Blocks until a batch is due; returns [] when stopped and empty
+        with self.cond:
+            while True:
+                if self.pending:
+                    due = self.first_time + self.max_delay
+                    if (len(self.pending) >= self.max_batch or not self.running
+                            or time.perf_counter() >= due):
+                        break
+                    self.cond.wait(due - time.perf_counter())
+                elif not self.running:
+                    return []
+                else:
+                    self.cond.wait()
+
+            batch = self.pending[:self.max_batch]
+            self.pending = self.pending[self.max_batch:]
+            if self.pending:
+                # Leftovers are already overdue, they go out next
+                self.first_time = time.perf_counter() - self.max_delay
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take()
+            if not batch:
+                return
+            frames = [frame for frame, _ in batch]
+            try:
+                with metrics.timer(self.timer):
+                    results = list(self.infer_batch(frames))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.frames += len(batch)
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+            for _, future in batch[len(results):]:
+                future.set_exception(RuntimeError(
+                    f"{self.name}: {len(results)} results for {len(batch)} frames"))
+
+    def stats(self):
+        return {"batches": self.batches, "frames": self.frames,
+                "mean_batch": round(self.frames / self.batches, 2)
+                if self.batches else 0.0}
+
+
+# ================= BATCH FUNCTIONS =================
+def classify_batch(classifier):
+    # MediaPipe's ImageClassifier takes one image per call; this keeps the
+    # batch interface so the same batcher and sweep work for it
+    import cv2
+    from classification import to_mp_image
+
+    def run(frames):
+        return [classifier.classify(to_mp_image(cv2.cvtColor(f, cv2.COLOR_BGR2RGB)))
+                for f in frames]
+    return run
+
+
+# ================= THROUGHPUT SWEEP =================
+def sweep(infer_batch, frames, sizes, repeat=3):
+    # Frames per second for each batch size, after one warm-up batch
+    out = {}
+    for size in sizes:
+        groups = [frames[i:i + size] for i in range(0, len(frames), size)]
+        infer_batch(groups[0])
+        start = time.perf_counter()
+        count = 0
+        for _ in range(repeat):
+            for group in groups:
+                infer_batch(group)
+                count += len(group)
+        elapsed = time.perf_counter() - start
+        out[size] = {"fps": round(count / elapsed, 2),
+                     "ms_per_frame": round(elapsed / count * 1000, 2)}
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput vs. batch size")
+    parser.add_argument("source", help="directory of frames, video or .mjpg recording")
+    parser.add_argument("--model", choices=("yolo", "classify"), default="yolo")
+    parser.add_argument("--sizes", default="1,2,4,8")
+    parser.add_argument("--max-frames", type=int, default=32)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="also write the numbers to this JSON file")
+    args = parser.parse_args()
+
+    from benchmark import load_frames
+    frames = load_frames(args.source, args.max_frames)
+
+    if args.model == "yolo":
+        from detector_backends import make_detector
+        detector = make_detector()
+        infer = detector.batch
+        print(f"yolo ({detector.backend}), {len(frames)} frames")
+    else:
+        from classification import make_classifier
+        infer = classify_batch(make_classifier())
+        print(f"classify, {len(frames)} frames")
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    results = sweep(infer, frames, sizes, args.repeat)
+    for size, r in results.items():
+        print(f"batch {size:3d}: {r['fps']:8.2f} fps  {r['ms_per_frame']:8.2f} ms/frame")
+
+    if args.output:
+        from benchmark import device_model
+        with open(args.output, "w") as f:
+            json.dump({"model": args.model, "device": device_model(),
+                       "cpus": os.cpu_count(), "frames": len(frames),
+                       "sweep": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from frame_source import open_source
+
+# ================= BENCHMARK =================
+# Replays recorded frames through each stage of the capture-to-speech
+# pipeline and reports per-stage latency percentiles, throughput and peak
+# RSS as JSON, so runs can be compared across Pi models and commits:
+#
+#   python benchmark.py frames/ --stages offline,online,classify,render
+#   python benchmark.py clip.mp4 --max-frames 50 -o bench.json
+#   python benchmark.py session.mjpg --stages offline    (frame_source.py)
+#
+# The online stage talks to fake_vision_server.py on localhost (with an
+# optional --vision-delay to model network latency), never to Google.
+
+STAGES = ("offline", "online", "classify", "render", "tts")
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+# ================= INPUT =================
+def load_frames(source, max_frames):
+    frames = []
+    if os.path.isdir(source):
+        paths = sorted(p for p in glob.glob(os.path.join(source, "*"))
+                       if p.lower().endswith(IMAGE_EXTS))
+        for p in paths[:max_frames]:
+            frame = cv2.imread(p)
+            if frame is not None:
+                frames.append(frame)
+    else:
+        # Video files and frame_source.py recordings, at full speed
+        cap = open_source(source, speed=0, loop=False)
+        while len(frames) < max_frames:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            frames.append(frame)
+        cap.release()
+    if not frames:
+        raise SystemExit(f"No frames loaded from {source}")
+    return frames
+
+
+# ================= MEASUREMENT =================
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def run_stage(fn, frames, repeat, warmup=1):
+    for frame in frames[:warmup]:
+        fn(frame)
+
+    times = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for frame in frames:
+            t = time.perf_counter()
+            fn(frame)
+            times.append(time.perf_counter() - t)
+    total = time.perf_counter() - start
+
+    ms = np.array(times) * 1000
+    return {
+        "runs": len(times),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(ms, 95)), 2),
+        "mean_ms": round(float(ms.mean()), 2),
+        "max_ms": round(float(ms.max()), 2),
+        "throughput_fps": round(len(times) / total, 2),
+        # Process-wide high-water mark, so it only grows stage to stage
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+# ================= STAGES =================
+# Each builder sets up its stage once and returns fn(frame)
+def stage_offline(args):
+    from detection import offline_detect
+    return lambda frame: offline_detect(frame)
+
+
+def stage_online(args):
+    import fake_vision_server
+    server = fake_vision_server.serve(args.vision_port, args.vision_delay)
+    os.environ["VISION_ENDPOINT"] = f"http://127.0.0.1:{server.server_port}"
+
+    from detection import online_detect
+    # online_detect draws on its input
+    return lambda frame: online_detect(frame.copy())
+
+
+def stage_classify(args):
+    from classification import make_classifier, to_mp_image
+    classifier = make_classifier()
+
+    def classify(frame):
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        return classifier.classify(to_mp_image(rgb))
+    return classify
+
+
+def stage_render(args):
+    import tkinter as tk
+    from preview_renderer import PreviewRenderer
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        raise RuntimeError(f"no display for the render stage ({e})")
+    label = tk.Label(root)
+    label.pack()
+    preview = PreviewRenderer(label, max_fps=0)
+    width, height = args.render_size
+
+    def render(frame):
+        preview.render(frame, width, height)
+        root.update_idletasks()
+    return render
+
+
+def stage_tts(args):
+    import pyttsx3
+
+    # Synthesis to a WAV file only, no playback
+    engine = pyttsx3.init()
+    out = os.path.join(tempfile.mkdtemp(prefix="tts_bench_"), "speech.wav")
+    count = [0]
+
+    def tts(frame):
+        count[0] += 1
+        engine.save_to_file(f"Objects: item {count[0]}\nText: None", out)
+        engine.runAndWait()
+    return tts
+
+
+BUILDERS = {
+    "offline": stage_offline,
+    "online": stage_online,
+    "classify": stage_classify,
+    "render": stage_render,
+    "tts": stage_tts,
+}
+
+
+# ================= REPORT =================
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def device_model():
+    # Raspberry Pi boards report their model here
+    try:
+        with open("/proc/device-tree/model") as f:
+            return f.read().strip("\x00\n")
+    except OSError:
+        return platform.processor() or platform.machine()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline benchmark")
+    parser.add_argument("source", help="directory of frames or a video file")
+    parser.add_argument("--stages", default="offline,online,classify,render")
+    parser.add_argument("--max-frames", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--vision-port", type=int, default=0)
+    parser.add_argument("--vision-delay", type=float, default=0.0,
+                        help="simulated Vision round-trip in seconds")
+    parser.add_argument("--render-size", type=int, nargs=2, default=(800, 340),
+                        metavar=("W", "H"))
+    parser.add_argument("-o", "--output", help="write JSON here (default stdout)")
+    args = parser.parse_args()
+
+    stages = [name.strip() for name in args.stages.split(",")]
+    for name in stages:
+        if name not in BUILDERS:
+            raise SystemExit(f"Unknown stage {name!r}, choose from {STAGES}")
+
+    frames = load_frames(args.source, args.max_frames)
+    h, w = frames[0].shape[:2]
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "device": device_model(),
+            "machine": platform.machine(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "source": os.path.basename(os.path.normpath(args.source)),
+            "frames": len(frames),
+            "frame_size": [w, h],
+            "repeat": args.repeat,
+        },
+        "stages": {},
+    }
+
+    for name in stages:
+        print(f"[{name}] ...", file=sys.stderr)
+        try:
+            fn = BUILDERS[name](args)
+            report["stages"][name] = run_stage(fn, frames, args.repeat)
+        except Exception as e:
+            report["stages"][name] = {"error": str(e)}
+        print(f"[{name}] {report['stages'][name]}", file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
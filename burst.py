@@ -0,0 +1,103 @@
+import os
+import time
+
+import cv2
+import numpy as np
+
+from metrics import metrics
+
+
+# ================= BURST CAPTURE =================
+# The frame that happens to be on screen when CAPTURE is pressed is often
+# motion blurred (the hand pressing the button shakes the camera) or caught
+# mid auto-exposure. best_frame() takes the newest frame plus the next few
+# from a FrameGrabber, scores each one cheaply and returns a copy of the
+# best, which is what goes to the detector:
+#
+#   score = sharpness * exposure
+#
+# Sharpness is the variance of the Laplacian of a small grayscale copy; a
+# blurred frame has weak edges and a low variance. Exposure is 1 for a
+# well-exposed frame and drops as the mean brightness drifts away from
+# mid-grey or pixels clip to black / white, so a sharp but blown-out frame
+# doesn't win. Scoring a 160 px wide copy takes well under a millisecond;
+# the burst itself costs about count / fps seconds of waiting on the camera.
+#
+#   BURST_FRAMES=5      frames per burst (default 5, 1 turns burst off)
+
+BURST_FRAMES = max(1, int(os.environ.get("BURST_FRAMES", "5")))
+SCORE_WIDTH = 160
+CLIP_LOW, CLIP_HIGH = 8, 247
+
+
+def _small_gray(frame, width=SCORE_WIDTH):
+    h, w = frame.shape[:2]
+    if w > width:
+        frame = cv2.resize(frame, (width, max(1, round(h * width / w))),
+                           interpolation=cv2.INTER_AREA)
+    if frame.ndim == 3:
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return frame
+
+
+def sharpness(gray):
+    return float(cv2.Laplacian(gray, cv2.CV_32F).var())
+
+
+def exposure(gray):
+    clipped = np.count_nonzero((gray <= CLIP_LOW) | (gray >= CLIP_HIGH)) / gray.size
+    offset = abs(float(gray.mean()) / 255.0 - 0.5)
+    # Never quite zero, so frames of a dim scene still rank by sharpness
+    return (1.0 - 0.9 * clipped) * (1.0 - offset)
+
+
+def frame_score(frame, width=SCORE_WIDTH):
+    gray = _small_gray(frame, width)
+    return sharpness(gray) * exposure(gray)
+
+
+def best_frames(grabber, count=BURST_FRAMES, keep=1, timeout=1.0):
+    # Private copies of the `keep` best of the next `count` frames, best
+    # first; empty if the camera has produced nothing yet. If the camera
+    # stalls, the frames seen so far are used.
+    seq, frame = grabber.latest()
+    if frame is None:
+        seq, frame = grabber.wait(0, timeout)
+        if frame is None:
+            return []
+
+    kept = []    # [score, frame], best first
+    deadline = time.monotonic() + timeout
+    with metrics.timer("burst"):
+        for i in range(count):
+            if i:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                new_seq, frame = grabber.wait(seq, remaining)
+                if new_seq == seq:
+                    break
+                seq = new_seq
+
+            # Scored in place in the ring; only frames that make the cut
+            # are copied out, into the buffer of the one they displace
+            score = frame_score(frame)
+            if len(kept) < keep:
+                kept.append([score, frame.copy()])
+            elif score > kept[-1][0]:
+                worst = kept.pop()
+                if worst[1].shape == frame.shape:
+                    worst[1][...] = frame
+                    kept.append([score, worst[1]])
+                else:
+                    kept.append([score, frame.copy()])
+            else:
+                continue
+            kept.sort(key=lambda k: -k[0])
+    return [f for _, f in kept]
+
+
+def best_frame(grabber, count=BURST_FRAMES, timeout=1.0):
+    # The single best frame of the burst, or None without a camera frame
+    frames = best_frames(grabber, count, 1, timeout)
+    return frames[0] if frames else None
@@ -0,0 +1,126 @@
+import os
+
+import mediapipe as mp
+from mediapipe.tasks.python import vision
+from mediapipe.tasks.python.core.base_options import BaseOptions
+
+
+# ---------------- Allowed Library ---------------- #
+LIBRARY = set([
+    *[str(i) for i in range(11)],
+    *[chr(i) for i in range(65, 91)],
+    "APPLE","BANANA","PINEAPPLE","MANGO","GRAPES","ORANGE","WATERMELON","STRAWBERRY",
+    "EGGPLANT","CARROT","CABBAGE","PUMPKIN","GARLIC","ONION","RADISH","BELL PEPPER","CUCUMBER","LETTUCE",
+    "CAT","DOG","COW","FISH","SHARK","CHICKEN","DUCK","SHEEP","HORSE","PIG",
+    "PENCIL","NOTEBOOK","CHALK","ERASER","CHAIR","PHONE","PEN","BAG","BOOK","PERSON"
+])
+
+# ---------------- Model Label Index ---------------- #
+# The classifier's 1,001 ImageNet classes rarely match LIBRARY names as
+# written, so LIBRARY entries list the model classes that count as them.
+# A model class whose upper-cased name is itself in LIBRARY ("banana",
+# "bell pepper") needs no entry here.
+#
+# The index ships next to this module, so it is found from any working
+# directory; the name keeps it clear of extract_labels.py's output.
+LABELS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           "imagenet_labels.txt")
+
+SYNONYMS = {
+    "APPLE": ["Granny Smith"],
+    "CABBAGE": ["head cabbage"],
+    "PUMPKIN": ["jack-o'-lantern", "butternut squash", "acorn squash"],
+    "CAT": ["tabby", "tiger cat", "Persian cat", "Siamese cat", "Egyptian cat"],
+    "COW": ["ox", "water buffalo"],
+    "FISH": ["tench", "goldfish", "coho", "barracouta", "rock beauty",
+             "anemone fish", "sturgeon", "gar", "lionfish", "puffer"],
+    "SHARK": ["great white shark", "tiger shark", "hammerhead"],
+    "CHICKEN": ["cock", "hen"],
+    "DUCK": ["drake", "red-breasted merganser"],
+    "SHEEP": ["ram", "bighorn"],
+    "HORSE": ["sorrel"],
+    "PIG": ["hog", "wild boar"],
+    "ERASER": ["rubber eraser"],
+    "PEN": ["ballpoint", "fountain pen"],
+    "PHONE": ["cellular telephone", "dial telephone", "pay-phone"],
+    "CHAIR": ["folding chair", "rocking chair", "barber chair"],
+    "BAG": ["backpack", "purse", "mailbag", "plastic bag"],
+    "BOOK": ["book jacket", "comic book"],
+    "PERSON": ["scuba diver", "groom", "ballplayer"],
+}
+
+# ImageNet's 118 dog breeds are one contiguous block of classes
+SYNONYM_RANGES = {
+    "DOG": ("Chihuahua", "Mexican hairless"),
+}
+
+
+def load_label_index(path=LABELS_PATH):
+    # Returns (model class names, {class index: LIBRARY entry})
+    if not os.path.exists(path):
+        return [], {}
+    with open(path) as f:
+        names = [line.strip() for line in f]
+    position = {name: i for i, name in enumerate(names)}
+
+    index = {}
+    for i, name in enumerate(names):
+        if name.upper() in LIBRARY:
+            index[i] = name.upper()
+    for entry, synonyms in SYNONYMS.items():
+        for name in synonyms:
+            if name in position:
+                index[position[name]] = entry
+    for entry, (first, last) in SYNONYM_RANGES.items():
+        if first in position and last in position:
+            for i in range(position[first], position[last] + 1):
+                index[i] = entry
+    return names, index
+
+
+# Built once at import; empty if the index is missing, in which case
+# categories are matched by name as before
+LABEL_NAMES, LABEL_INDEX = load_label_index()
+
+# ---------------- MediaPipe Classifier ---------------- #
+MODEL_PATH = "mobilenet_v1_1.0_224.tflite"
+
+
+def make_classifier(model_path=MODEL_PATH, max_results=5, score_threshold=0.05,
+                    allowed_only=True):
+    # allowed_only: MediaPipe drops every class outside LIBRARY itself, so
+    # max_results counts only classes we can use
+    allowlist = None
+    if allowed_only and LABEL_INDEX:
+        allowlist = [LABEL_NAMES[i] for i in sorted(LABEL_INDEX)]
+    options = vision.ImageClassifierOptions(
+        base_options=BaseOptions(model_asset_path=model_path),
+        max_results=max_results,
+        score_threshold=score_threshold,
+        category_allowlist=allowlist
+    )
+    return vision.ImageClassifier.create_from_options(options)
+
+
+def to_mp_image(rgb):
+    return mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb)
+
+
+# Returns every category as (label, score, allowed). Allowed categories
+# are named by their LIBRARY entry, each entry once at its best score.
+def categories(result):
+    found = []
+    seen = set()
+    if result.classifications:
+        for c in result.classifications[0].categories:
+            label = c.category_name.upper()
+            if LABEL_INDEX:
+                entry = LABEL_INDEX.get(c.index)
+            else:
+                entry = label if label in LIBRARY else None
+            if entry is None:
+                found.append((label, c.score, False))
+            elif entry not in seen:
+                seen.add(entry)
+                found.append((entry, c.score, True))
+    return found
@@ -0,0 +1,135 @@
+import socket
+import threading
+import time
+
+
+# ================= CONNECTIVITY MONITOR =================
+# Probes the Vision API host in the background so AUTO mode can read a
+# cached online/offline flag instead of doing a DNS lookup per capture.
+#
+# The state only flips after `up_after` consecutive successful probes (or
+# `down_after` failures), so a single dropped packet doesn't bounce the
+# app between backends. Capture latencies reported through record() are
+# smoothed per backend and choose() picks whichever has been faster.
+class ConnectivityMonitor:
+    def __init__(self, host="vision.googleapis.com", port=443, interval=5.0,
+                 timeout=1.5, up_after=2, down_after=2, smoothing=0.7,
+                 stale_after=300.0):
+        self.host = host
+        self.port = port
+        self.interval = interval
+        self.timeout = timeout
+        self.up_after = up_after
+        self.down_after = down_after
+        self.smoothing = smoothing
+        self.stale_after = stale_after
+
+        self.lock = threading.Lock()
+        self.online = False
+        self.streak = 0
+        self.probe_latency = None
+        self.latency = {}     # backend -> smoothed seconds
+        self.updated = {}     # backend -> time of last record()
+
+        self.wake = threading.Event()
+        self.running = False
+        self.thread = None
+
+    # ---------- lifecycle ----------
+    def start(self):
+        if self.running:
+            return self
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="connectivity",
+                                       daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        self.wake.set()
+
+    # ---------- probing ----------
+    def _probe(self):
+        # TCP connect with its own timeout; never touches the global default
+        start = time.perf_counter()
+        try:
+            with socket.create_connection((self.host, self.port),
+                                          timeout=self.timeout):
+                pass
+        except OSError:
+            return False
+        self.probe_latency = time.perf_counter() - start
+        return True
+
+    def _run(self):
+        # First probe decides the initial state directly
+        ok = self._probe()
+        with self.lock:
+            self.online = ok
+
+        while self.running:
+            self.wake.wait(self.interval)
+            self.wake.clear()
+            if not self.running:
+                break
+            self._observe(self._probe())
+
+    def _observe(self, ok):
+        with self.lock:
+            if ok == self.online:
+                self.streak = 0
+                return
+            self.streak += 1
+            if self.streak >= (self.up_after if ok else self.down_after):
+                self.online = ok
+                self.streak = 0
+
+    def report_failure(self):
+        # A failed Vision call counts as a probe failure and triggers a
+        # re-probe right away instead of waiting for the next interval
+        self._observe(False)
+        self.wake.set()
+
+    # ---------- latency ----------
+    def record(self, backend, seconds):
+        with self.lock:
+            prev = self.latency.get(backend)
+            if prev is None:
+                self.latency[backend] = seconds
+            else:
+                a = self.smoothing
+                self.latency[backend] = a * prev + (1 - a) * seconds
+            self.updated[backend] = time.time()
+
+    def choose(self):
+        # Returns "ONLINE" or "OFFLINE" for AUTO mode
+        with self.lock:
+            if not self.online:
+                return "OFFLINE"
+
+            online = self.latency.get("ONLINE")
+            offline = self.latency.get("OFFLINE")
+            # Take one sample of each before comparing
+            if online is None:
+                return "ONLINE"
+            if offline is None:
+                return "OFFLINE"
+
+            # Re-measure a backend whose estimate has gone stale
+            now = time.time()
+            for backend in ("ONLINE", "OFFLINE"):
+                if now - self.updated[backend] > self.stale_after:
+                    return backend
+
+            return "ONLINE" if online <= offline else "OFFLINE"
+
+    def stats(self):
+        with self.lock:
+            return {
+                "online": self.online,
+                "probe_ms": None if self.probe_latency is None
+                else round(self.probe_latency * 1000),
+                "latency_ms": {k: round(v * 1000)
+                               for k, v in self.latency.items()},
+            }
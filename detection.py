@@ -0,0 +1,105 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from batching import MicroBatcher
+from metrics import metrics
+from models import LazyModel, load_yolo, warm_yolo, load_ocr, warm_ocr, load_vision
+import overlay
+from results import DetectionResult
+from text_regions import read_text
+from vision_batch import annotate
+
+# ================= DETECTION PIPELINE =================
+# The offline (YOLO + EasyOCR) and online (Google Vision) detectors behind
+# image_detection_final.py. Kept free of Tk so they can be imported by the
+# benchmark and other headless tools.
+
+# ================= OFFLINE MODELS =================
+# Nothing is loaded at import: models load on first use, or are warmed in
+# the background for the current mode once the preview is running
+yolo_model = LazyModel("yolo", load_yolo, warm_yolo)
+ocr_reader = LazyModel("easyocr", load_ocr, warm_ocr)
+
+# ================= GOOGLE VISION =================
+vision_client = LazyModel("vision", load_vision)
+
+# Uploads are downscaled and re-encoded before they leave the device
+JPEG_QUALITY = 85
+UPLOAD_MAX_SIDE = 640
+
+# ================= DRAW YOLO =================
+def draw_boxes(frame, dets):
+    names = dets.labels()
+    overlay.draw_boxes(frame, dets.boxes, names)
+    return frame, names
+
+# ================= SHARED YOLO =================
+# Capture, live tracking and the multi-camera scheduler share one YOLO
+# instance, and ultralytics predictors are not thread-safe: every call
+# goes through yolo_batch_call(), which holds this lock
+yolo_lock = threading.Lock()
+
+def yolo_batch_call(frames):
+    detector = yolo_model.get()
+    with yolo_lock:
+        return detector.batch(frames)
+
+# Single frames from CAPTURE and live tracking go through a micro-batcher:
+# requests that arrive together run as one batch call
+yolo_batcher = MicroBatcher(yolo_batch_call, max_batch=4, max_delay=0.005,
+                            name="yolo", timer="yolo")
+
+def run_yolo(frame):
+    return yolo_batcher.start().submit(frame).result()
+
+# ================= OFFLINE DETECTION =================
+# Both detectors return (annotated_frame, DetectionResult)
+
+# OCR runs on this thread while YOLO runs on the caller's. Both release
+# the GIL during inference and each is pinned to half the cores
+# (models.MODEL_THREADS), so the offline latency is roughly the slower of
+# the two rather than their sum.
+ocr_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ocr")
+
+def run_ocr(frame):
+    reader = ocr_reader.get()
+    # OCR only where MSER finds text-like blobs; skipped when there are none
+    with metrics.timer("ocr"):
+        return read_text(reader, frame)
+
+def offline_detect(frame):
+    h,w,_ = frame.shape
+    start = time.perf_counter()
+
+    # Both models read the same frame and neither writes to it; the only
+    # copy is the one the results are drawn on
+    texts = ocr_pool.submit(run_ocr, frame)
+    dets = run_yolo(frame)
+    texts = texts.result()
+
+    result = DetectionResult.merge("yolo+easyocr", [
+        DetectionResult.from_yolo(dets, (w,h)),
+        DetectionResult.from_ocr(texts, (w,h), min_conf=0.4),
+    ])
+    # Wall time for both; compare with the yolo and ocr stages
+    result.latency = time.perf_counter() - start
+    metrics.observe("offline_detect", result.latency)
+    return result.draw(frame.copy()), result
+
+# ================= ONLINE DETECTION =================
+def online_detect(frame):
+    # Objects and OCR in a single round-trip; draws on frame
+    res = annotate(vision_client.get(), frame, JPEG_QUALITY, UPLOAD_MAX_SIDE)
+
+    h,w,_ = frame.shape
+    result = DetectionResult.from_vision(res, (w,h))
+    return result.draw(frame), result
+
+# ================= MODEL PRELOAD =================
+def preload_models(mode):
+    if mode in ("AUTO", "ONLINE"):
+        vision_client.preload()
+    if mode in ("AUTO", "OFFLINE"):
+        yolo_model.preload()
+        ocr_reader.preload()
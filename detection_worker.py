@@ -0,0 +1,78 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+# ================= DETECTION WORKER =================
+# Runs detection jobs off the Tk main thread. Results are handed back
+# through a queue that is drained with root.after(), so callbacks always
+# run on the Tk thread and are free to touch widgets.
+class DetectionWorker:
+    def __init__(self, root, max_workers=1, poll_ms=30):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix="detect")
+        self.results = queue.Queue()
+        self.lock = threading.Lock()
+        self.generation = 0
+        self.pending = None
+        self.closed = False
+        self.root.after(self.poll_ms, self._poll)
+
+    def submit(self, fn, *args, on_result, on_error=None):
+        # A new job supersedes whatever is still running
+        with self.lock:
+            self.generation += 1
+            job = self.generation
+            if self.pending is not None:
+                self.pending.cancel()
+            future = self.executor.submit(fn, *args)
+            self.pending = future
+
+        future.add_done_callback(
+            lambda f: self.results.put((job, f, on_result, on_error))
+        )
+        return future
+
+    def cancel(self):
+        # Running jobs cannot be interrupted, but their results are dropped
+        with self.lock:
+            self.generation += 1
+            if self.pending is not None:
+                self.pending.cancel()
+                self.pending = None
+
+    def busy(self):
+        with self.lock:
+            return self.pending is not None and not self.pending.done()
+
+    def _poll(self):
+        while True:
+            try:
+                job, future, on_result, on_error = self.results.get_nowait()
+            except queue.Empty:
+                break
+
+            with self.lock:
+                stale = job != self.generation
+                if not stale:
+                    self.pending = None
+            if stale or future.cancelled():
+                continue
+
+            error = future.exception()
+            if error is None:
+                on_result(future.result())
+            elif on_error is not None:
+                on_error(error)
+            else:
+                print("Detection error:", error)
+
+        if not self.closed:
+            self.root.after(self.poll_ms, self._poll)
+
+    def shutdown(self):
+        self.closed = True
+        self.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
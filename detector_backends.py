@@ -0,0 +1,364 @@
+import argparse
+import ast
+import glob
+import os
+import platform
+import time
+
+import cv2
+import numpy as np
+
+# ================= CONFIG =================
+# DETECTOR_BACKEND picks the runner per device:
+#   torch      - ultralytics / PyTorch (reference)
+#   onnx       - ONNX Runtime on the exported model
+#   onnx-int8  - ONNX Runtime on the dynamically quantized model
+#   auto       - onnx on ARM boards when the export exists, torch otherwise
+# DETECTOR_DYNAMIC=1 makes the onnx backends use the variable-batch export
+DEFAULT_WEIGHTS = "yolov8n.pt"
+ARM_MACHINES = ("aarch64", "arm64", "armv7l", "armv6l")
+
+
+# ================= DETECTIONS =================
+# Plain NumPy arrays so drawing and result handling don't care which
+# backend produced them. Boxes are xyxy in input-frame pixels.
+class Detections:
+    __slots__ = ("boxes", "scores", "class_ids", "names")
+
+    def __init__(self, boxes, scores, class_ids, names):
+        self.boxes = boxes
+        self.scores = scores
+        self.class_ids = class_ids
+        self.names = names
+
+    def __len__(self):
+        return len(self.scores)
+
+    def labels(self):
+        # Class index as text when a model carries no name for it
+        return [self.names.get(int(c), str(int(c))) for c in self.class_ids]
+
+
+# ================= PYTORCH BACKEND =================
+class TorchDetector:
+    backend = "torch"
+
+    def __init__(self, weights=DEFAULT_WEIGHTS, conf=0.25, iou=0.7):
+        from ultralytics import YOLO
+        self.model = YOLO(weights)
+        self.names = self.model.names
+        self.conf = conf
+        self.iou = iou
+
+    def __call__(self, frame):
+        return self.batch([frame])[0]
+
+    def batch(self, frames):
+        # One forward pass for the whole list
+        results = self.model(list(frames), conf=self.conf, iou=self.iou,
+                             verbose=False)
+        out = []
+        for r in results:
+            b = r.boxes
+            out.append(Detections(
+                b.xyxy.cpu().numpy().astype(np.float32),
+                b.conf.cpu().numpy().astype(np.float32),
+                b.cls.cpu().numpy().astype(np.int32),
+                r.names,
+            ))
+        return out
+
+
+# ================= ONNX RUNTIME BACKEND =================
+class OnnxDetector:
+    backend = "onnx"
+
+    def __init__(self, model_path, conf=0.25, iou=0.7, threads=None):
+        import onnxruntime as ort
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            opts.intra_op_num_threads = threads
+
+        # Use OpenVINO when onnxruntime-openvino is installed
+        available = ort.get_available_providers()
+        providers = [p for p in ("OpenVINOExecutionProvider",
+                                 "CPUExecutionProvider") if p in available]
+
+        self.session = ort.InferenceSession(model_path, opts, providers=providers)
+        self.input_name = self.session.get_inputs()[0].name
+        shape = self.session.get_inputs()[0].shape
+        self.imgsz = shape[2] if isinstance(shape[2], int) else 640
+        # Exports made with dynamic=True take any batch size
+        self.dynamic_batch = not isinstance(shape[0], int)
+        self.conf = conf
+        self.iou = iou
+
+        meta = self.session.get_modelmeta().custom_metadata_map
+        self.names = load_names(model_path, meta)
+
+    def _letterbox(self, frame):
+        h, w = frame.shape[:2]
+        r = min(self.imgsz / h, self.imgsz / w)
+        nh, nw = int(round(h * r)), int(round(w * r))
+        top = (self.imgsz - nh) // 2
+        left = (self.imgsz - nw) // 2
+
+        canvas = np.full((self.imgsz, self.imgsz, 3), 114, np.uint8)
+        canvas[top:top + nh, left:left + nw] = cv2.resize(
+            frame, (nw, nh), interpolation=cv2.INTER_LINEAR)
+
+        blob = cv2.dnn.blobFromImage(canvas, 1 / 255.0, swapRB=True)
+        return blob, r, left, top
+
+    def __call__(self, frame):
+        blob, r, left, top = self._letterbox(frame)
+        out = self.session.run(None, {self.input_name: blob})[0]
+        return self._decode(out[0], frame.shape, r, left, top)
+
+    def batch(self, frames):
+        if not self.dynamic_batch:
+            return [self(frame) for frame in frames]
+        prepared = [self._letterbox(frame) for frame in frames]
+        blob = np.concatenate([p[0] for p in prepared])
+        out = self.session.run(None, {self.input_name: blob})[0]
+        return [self._decode(o, frame.shape, r, left, top)
+                for o, frame, (_, r, left, top) in zip(out, frames, prepared)]
+
+    def _decode(self, out, shape, r, left, top):
+        # (4 + classes, anchors) -> (anchors, 4 + classes)
+        pred = out.T
+        class_scores = pred[:, 4:]
+        class_ids = class_scores.argmax(axis=1)
+        scores = class_scores[np.arange(len(pred)), class_ids]
+
+        keep = scores > self.conf
+        pred, scores, class_ids = pred[keep], scores[keep], class_ids[keep]
+        if len(scores) == 0:
+            return Detections(np.zeros((0, 4), np.float32),
+                              np.zeros(0, np.float32),
+                              np.zeros(0, np.int32), self.names)
+
+        cx, cy, bw, bh = pred[:, 0], pred[:, 1], pred[:, 2], pred[:, 3]
+        boxes = np.stack([cx - bw / 2, cy - bh / 2, cx + bw / 2, cy + bh / 2], 1)
+
+        # Class-aware NMS: shift each class into its own coordinate range
+        offset = class_ids[:, None].astype(np.float32) * 4096
+        shifted = boxes + offset
+        xywh = np.concatenate([shifted[:, :2], shifted[:, 2:] - shifted[:, :2]], 1)
+        idx = cv2.dnn.NMSBoxes(xywh.tolist(), scores.tolist(), self.conf, self.iou)
+        idx = np.array(idx, dtype=np.int64).reshape(-1)
+
+        # Undo the letterbox
+        boxes = boxes[idx]
+        boxes[:, [0, 2]] -= left
+        boxes[:, [1, 3]] -= top
+        boxes /= r
+        h, w = shape[:2]
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, w)
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, h)
+
+        return Detections(boxes.astype(np.float32),
+                          scores[idx].astype(np.float32),
+                          class_ids[idx].astype(np.int32), self.names)
+
+
+# ================= CLASS NAMES =================
+# ultralytics stores the class names in the ONNX metadata, but quantized
+# copies and third-party exports may not carry them. A sidecar file next
+# to the model (<model>.names, one name per line in class order) covers
+# those; without either, labels fall back to the class index.
+def names_path(model_path):
+    return os.path.splitext(model_path)[0] + ".names"
+
+
+def load_names(model_path, meta=None):
+    if meta and "names" in meta:
+        return ast.literal_eval(meta["names"])
+    path = names_path(model_path)
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return {i: line.strip() for i, line in enumerate(f) if line.strip()}
+    return {}
+
+
+def write_names(model_path, names):
+    with open(names_path(model_path), "w", encoding="utf-8") as f:
+        for i in sorted(names):
+            f.write(names[i] + "\n")
+
+
+# ================= EXPORT =================
+def onnx_path(weights, int8=False, dynamic=False):
+    # Static and variable-batch exports live side by side
+    base = os.path.splitext(weights)[0]
+    return (base + ("-dynamic" if dynamic else "") +
+            ("-int8.onnx" if int8 else ".onnx"))
+
+
+def _export(weights, imgsz, dynamic, path):
+    from ultralytics import YOLO
+
+    # ultralytics always writes <weights>.onnx; keep a static export that
+    # is already there out of the way of a dynamic one
+    default = onnx_path(weights)
+    aside = None
+    if path != default and os.path.exists(default):
+        aside = default + ".keep"
+        os.replace(default, aside)
+    try:
+        out = YOLO(weights).export(format="onnx", imgsz=imgsz, dynamic=dynamic)
+        if os.path.abspath(out) != os.path.abspath(path):
+            os.replace(out, path)
+    finally:
+        if aside is not None:
+            os.replace(aside, default)
+    return path
+
+
+def export_onnx(weights=DEFAULT_WEIGHTS, imgsz=640, int8=False, dynamic=False):
+    # dynamic: variable batch size, for detector.batch() in one session run
+    path = onnx_path(weights, dynamic=dynamic)
+    if not os.path.exists(path):
+        path = _export(weights, imgsz, dynamic, path)
+
+    if not int8:
+        return path
+
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    from ultralytics import YOLO
+
+    # Weight-only dynamic quantization: no calibration set needed
+    int8_path = onnx_path(weights, int8=True, dynamic=dynamic)
+    quantize_dynamic(path, int8_path, weight_type=QuantType.QUInt8)
+    write_names(int8_path, YOLO(weights).names)
+    return int8_path
+
+
+# ================= FACTORY =================
+def make_detector(backend=None, weights=None, threads=None, dynamic=None):
+    backend = backend or os.environ.get("DETECTOR_BACKEND", "auto")
+    weights = weights or os.environ.get("DETECTOR_WEIGHTS", DEFAULT_WEIGHTS)
+    if dynamic is None:
+        dynamic = os.environ.get("DETECTOR_DYNAMIC") == "1"
+
+    if backend == "auto":
+        backend = "torch"
+        if platform.machine().lower() in ARM_MACHINES:
+            if os.path.exists(onnx_path(weights, int8=True)):
+                backend = "onnx-int8"
+            elif os.path.exists(onnx_path(weights)):
+                backend = "onnx"
+
+    if backend == "torch":
+        return TorchDetector(weights)
+    if backend in ("onnx", "onnx-int8"):
+        int8 = backend == "onnx-int8"
+        path = onnx_path(weights, int8, dynamic)
+        if not os.path.exists(path):
+            path = export_onnx(weights, int8=int8, dynamic=dynamic)
+        detector = OnnxDetector(path, threads=threads)
+        detector.backend = backend
+        return detector
+    raise ValueError(f"Unknown detector backend: {backend}")
+
+
+# ================= PARITY / LATENCY =================
+def box_iou(a, b):
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = (x2 - x1).clip(0) * (y2 - y1).clip(0)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def compare(ref, other, min_iou=0.5):
+    # Greedy match by class and IoU; returns per-image parity numbers
+    matched, box_err, score_err = 0, [], []
+    if len(ref) and len(other):
+        iou = box_iou(ref.boxes, other.boxes)
+        iou[ref.class_ids[:, None] != other.class_ids[None, :]] = 0
+        used = set()
+        for i in np.argsort(-ref.scores):
+            j = int(iou[i].argmax())
+            if iou[i, j] < min_iou or j in used:
+                continue
+            used.add(j)
+            matched += 1
+            box_err.append(float(np.abs(ref.boxes[i] - other.boxes[j]).max()))
+            score_err.append(float(abs(ref.scores[i] - other.scores[j])))
+    return {
+        "reference": len(ref),
+        "other": len(other),
+        "matched": matched,
+        "max_box_px": max(box_err, default=0.0),
+        "max_score": max(score_err, default=0.0),
+    }
+
+
+def median_latency(detector, frames, runs=3):
+    detector(frames[0])
+    times = []
+    for _ in range(runs):
+        for frame in frames:
+            start = time.perf_counter()
+            detector(frame)
+            times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="YOLO detector backends")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("export", help="export weights to ONNX")
+    p.add_argument("--weights", default=DEFAULT_WEIGHTS)
+    p.add_argument("--imgsz", type=int, default=640)
+    p.add_argument("--int8", action="store_true")
+    p.add_argument("--dynamic", action="store_true", help="variable batch size")
+
+    p = sub.add_parser("compare", help="parity and latency vs. PyTorch")
+    p.add_argument("images", help="directory of test images")
+    p.add_argument("--weights", default=DEFAULT_WEIGHTS)
+    p.add_argument("--backends", default="onnx,onnx-int8")
+    p.add_argument("--threads", type=int, default=None)
+    p.add_argument("--runs", type=int, default=3)
+
+    args = parser.parse_args()
+
+    if args.cmd == "export":
+        print(export_onnx(args.weights, args.imgsz, args.int8, args.dynamic))
+        return
+
+    paths = sorted(glob.glob(os.path.join(args.images, "*.jpg")) +
+                   glob.glob(os.path.join(args.images, "*.png")))
+    frames = [f for f in (cv2.imread(p) for p in paths) if f is not None]
+    if not frames:
+        raise SystemExit(f"No images found in {args.images}")
+
+    ref = make_detector("torch", args.weights, args.threads)
+    ref_out = [ref(f) for f in frames]
+    ref_ms = median_latency(ref, frames, args.runs) * 1000
+    print(f"torch       {ref_ms:8.1f} ms")
+
+    for backend in args.backends.split(","):
+        det = make_detector(backend, args.weights, args.threads)
+        worst_box, worst_score, matched, total = 0.0, 0.0, 0, 0
+        for frame, r in zip(frames, ref_out):
+            c = compare(r, det(frame))
+            worst_box = max(worst_box, c["max_box_px"])
+            worst_score = max(worst_score, c["max_score"])
+            matched += c["matched"]
+            total += c["reference"]
+        ms = median_latency(det, frames, args.runs) * 1000
+        print(f"{backend:<11} {ms:8.1f} ms  x{ref_ms / ms:4.2f}  "
+              f"matched {matched}/{total}  "
+              f"max box err {worst_box:.2f}px  max score err {worst_score:.3f}")
+
+
+if __name__ == "__main__":
+    main()
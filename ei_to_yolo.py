@@ -0,0 +1,287 @@
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import re
+import time
+import urllib.request
+from multiprocessing import Pool
+
+import cv2
+import numpy as np
+
+from extract_labels import collect, iter_samples, ei_json_file, mapping_file
+
+# ================= EDGE IMPULSE -> YOLO =================
+# Turns an Edge Impulse bounding-box export into an ultralytics dataset
+# for retraining yolov8n on our own classes:
+#
+#   python ei_to_yolo.py --images export/ -o dataset/
+#   python ei_to_yolo.py --project 12345 -o dataset/   (EI_API_KEY set)
+#
+# Images come from a local export directory (matched by the sampleId at
+# the start or end of the file name) or are fetched from the Edge
+# Impulse API. A process pool
+# decodes, optionally centre-crops, resizes and re-encodes them. Output
+# files are named by the SHA-1 of the source image bytes, so duplicate
+# images are written once and an interrupted run resumes where it stopped.
+#
+#   dataset/images/{train,val}/<hash>.jpg
+#   dataset/labels/{train,val}/<hash>.txt   class cx cy w h, normalized
+#   dataset/labels.txt                      class names in YOLO index order
+#   dataset/data.yaml
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+API_URL = "https://studio.edgeimpulse.com/v1/api/{project}/raw-data/{sample}/image"
+
+# Worker-process globals, set up once by init_worker()
+config = None
+
+
+# ================= IMAGE SOURCES =================
+def index_images(root, sample_ids):
+    # {sampleId string: path}. A file matches a sample when the first or
+    # last token of its name, split on . _ - and spaces, is that sampleId
+    # ("2416989618.jpg", "dog.2416989618.jpg", "2416989618_cam.png").
+    # Files matching two samples, and samples matched by two files, are
+    # left out rather than guessed.
+    index, ambiguous = {}, set()
+    skipped = 0
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            if not name.lower().endswith(IMAGE_EXTS):
+                continue
+            tokens = re.split(r"[._\- ]+", os.path.splitext(name)[0])
+            matches = {t for t in (tokens[0], tokens[-1]) if t in sample_ids}
+            if len(matches) != 1:
+                skipped += len(matches) > 1
+                continue
+            sample = matches.pop()
+            if sample in index:
+                ambiguous.add(sample)
+            index[sample] = os.path.join(dirpath, name)
+
+    for sample in ambiguous:
+        del index[sample]
+    if skipped or ambiguous:
+        print(f"Ignored {skipped} files naming two samples and "
+              f"{len(ambiguous)} samples with several files")
+    return index
+
+
+def fetch_image(sample_id):
+    if config["images"] is not None:
+        path = config["images"].get(str(sample_id))
+        if path is None:
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+
+    url = API_URL.format(project=config["project"], sample=sample_id)
+    request = urllib.request.Request(url, headers={"x-api-key": config["api_key"]})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return response.read()
+
+
+# ================= WORKER =================
+def init_worker(cfg):
+    global config
+    config = cfg
+    # One image per process at a time: keep OpenCV single-threaded
+    cv2.setNumThreads(1)
+
+
+def yolo_lines(boxes, classes, width, height):
+    if not len(boxes):
+        return ""
+    b = np.asarray(boxes, np.float64)
+    cx = (b[:, 0] + b[:, 2] / 2) / width
+    cy = (b[:, 1] + b[:, 3] / 2) / height
+    rows = np.stack([cx, cy, b[:, 2] / width, b[:, 3] / height], 1).clip(0, 1)
+    return "".join(f"{c} {x:.6f} {y:.6f} {w:.6f} {h:.6f}\n"
+                   for c, (x, y, w, h) in zip(classes, rows.tolist()))
+
+
+def center_crop(image, boxes, min_visible):
+    # Square crop from the middle; boxes are clipped to it and dropped when
+    # less than min_visible of their area is left
+    h, w = image.shape[:2]
+    side = min(h, w)
+    x0, y0 = (w - side) // 2, (h - side) // 2
+    image = image[y0:y0 + side, x0:x0 + side]
+    if not len(boxes):
+        return image, boxes, np.zeros(0, bool)
+
+    b = np.asarray(boxes, np.float64)
+    x1 = np.clip(b[:, 0] - x0, 0, side)
+    y1 = np.clip(b[:, 1] - y0, 0, side)
+    x2 = np.clip(b[:, 0] + b[:, 2] - x0, 0, side)
+    y2 = np.clip(b[:, 1] + b[:, 3] - y0, 0, side)
+    area = np.maximum(b[:, 2] * b[:, 3], 1)
+    keep = (x2 - x1) * (y2 - y1) / area >= min_visible
+    return image, np.stack([x1, y1, x2 - x1, y2 - y1], 1), keep
+
+
+def convert_sample(sample):
+    # Returns (status, sample_id, hash); status is written / exists /
+    # missing / error
+    sample_id = sample.get("sampleId")
+    try:
+        data = fetch_image(sample_id)
+        if data is None:
+            return "missing", sample_id, None
+
+        digest = hashlib.sha1(data).hexdigest()
+        split = "val" if int(digest[:8], 16) % 100 < config["val_percent"] else "train"
+        image_path = os.path.join(config["output"], "images", split, digest + ".jpg")
+        label_path = os.path.join(config["output"], "labels", split, digest + ".txt")
+        if os.path.exists(label_path):
+            return "exists", sample_id, digest
+
+        image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            return "error", sample_id, digest
+
+        boxes = sample.get("boundingBoxes") or []
+        classes = [config["classes"][b["label"]] for b in boxes]
+        xywh = [(b["x"], b["y"], b["w"], b["h"]) for b in boxes]
+
+        if config["crop"]:
+            image, xywh, keep = center_crop(image, xywh, config["min_visible"])
+            xywh = xywh[keep] if len(xywh) else xywh
+            classes = [c for c, k in zip(classes, keep) if k]
+
+        # Labels are normalized, so resizing doesn't change them
+        h, w = image.shape[:2]
+        lines = yolo_lines(xywh, classes, w, h)
+        scale = config["imgsz"] / float(max(h, w))
+        if scale < 1.0:
+            image = cv2.resize(image, (round(w * scale), round(h * scale)),
+                               interpolation=cv2.INTER_AREA)
+
+        ok, buf = cv2.imencode(".jpg", image,
+                               [int(cv2.IMWRITE_JPEG_QUALITY), config["quality"]])
+        if not ok:
+            return "error", sample_id, digest
+
+        # Image first, label last: a label file marks a finished sample
+        for path, content in ((image_path, buf.tobytes()),
+                              (label_path, lines.encode())):
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(content)
+            os.replace(tmp, path)
+        return "written", sample_id, digest
+    except Exception as e:
+        print(f"\nSample {sample_id}: {e}")
+        return "error", sample_id, None
+
+
+# ================= DATASET FILES =================
+def class_names(label_ids, mapping_path):
+    mapping = {}
+    if os.path.exists(mapping_path):
+        with open(mapping_path) as f:
+            mapping = json.load(f)
+    return [mapping.get(str(i), f"UNKNOWN_{i}") for i in label_ids]
+
+
+def write_dataset_files(output, names):
+    with open(os.path.join(output, "labels.txt"), "w") as f:
+        for name in names:
+            f.write(name + "\n")
+    with open(os.path.join(output, "data.yaml"), "w") as f:
+        f.write(f"path: {os.path.abspath(output)}\n")
+        f.write("train: images/train\n")
+        f.write("val: images/val\n")
+        f.write("names:\n")
+        for i, name in enumerate(names):
+            f.write(f"  {i}: {json.dumps(name)}\n")
+
+
+# ================= MAIN =================
+def main():
+    parser = argparse.ArgumentParser(description="Edge Impulse export to YOLO dataset")
+    parser.add_argument("input", nargs="?", default=ei_json_file)
+    parser.add_argument("-o", "--output", default="dataset")
+    parser.add_argument("--mapping", default=mapping_file)
+    parser.add_argument("--images", help="directory with the exported images")
+    parser.add_argument("--project", help="Edge Impulse project ID to fetch from")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--imgsz", type=int, default=640,
+                        help="downscale so the longest side is at most this")
+    parser.add_argument("--crop", action="store_true",
+                        help="centre-crop to a square before resizing")
+    parser.add_argument("--min-visible", type=float, default=0.3,
+                        help="with --crop, drop boxes with less of their area left")
+    parser.add_argument("--quality", type=int, default=95)
+    parser.add_argument("--val", type=float, default=0.1, help="validation fraction")
+    args = parser.parse_args()
+
+    if args.images is None and args.project is None:
+        raise SystemExit("Give --images DIR or --project ID")
+    api_key = os.environ.get("EI_API_KEY")
+    if args.images is None and not api_key:
+        raise SystemExit("Set EI_API_KEY to fetch images from Edge Impulse")
+
+    # First pass: the label IDs, in constant memory, for a stable class
+    # order, and the sample IDs to match image files against
+    sample_ids = set()
+
+    def remember(samples):
+        for sample in samples:
+            sample_ids.add(str(sample.get("sampleId")))
+            yield sample
+
+    stats, total, _ = collect(remember(iter_samples(args.input)))
+    label_ids = sorted(stats)
+    names = class_names(label_ids, args.mapping)
+
+    for split in ("train", "val"):
+        os.makedirs(os.path.join(args.output, "images", split), exist_ok=True)
+        os.makedirs(os.path.join(args.output, "labels", split), exist_ok=True)
+    write_dataset_files(args.output, names)
+
+    cfg = {
+        "output": args.output,
+        "images": index_images(args.images, sample_ids) if args.images else None,
+        "project": args.project,
+        "api_key": api_key,
+        "classes": {label: i for i, label in enumerate(label_ids)},
+        "imgsz": args.imgsz,
+        "crop": args.crop,
+        "min_visible": args.min_visible,
+        "quality": args.quality,
+        "val_percent": round(args.val * 100),
+    }
+
+    # Second pass: stream samples to the pool in bounded chunks
+    samples = iter_samples(args.input)
+    counts = dict.fromkeys(("written", "exists", "duplicate", "missing", "error"), 0)
+    seen = set()
+    done = 0
+    chunk = args.workers * 16
+    start = time.perf_counter()
+
+    with Pool(args.workers, initializer=init_worker, initargs=(cfg,)) as pool:
+        while True:
+            batch = list(itertools.islice(samples, chunk))
+            if not batch:
+                break
+            for status, _, digest in pool.imap_unordered(convert_sample, batch):
+                if digest is not None and status in ("written", "exists"):
+                    if digest in seen:
+                        status = "duplicate"
+                    seen.add(digest)
+                counts[status] += 1
+                done += 1
+            rate = done / (time.perf_counter() - start)
+            print(f"\r{done}/{total} samples ({rate:.1f}/s)", end="", flush=True)
+
+    print(f"\n{len(names)} classes, {len(seen)} unique images in {args.output}")
+    print(", ".join(f"{k}: {v}" for k, v in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
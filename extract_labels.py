@@ -1,50 +1,241 @@
+import argparse
 import json
+import math
+import os
 
 # ------------------ CONFIG ------------------
 ei_json_file = "training_labels.json"   # Edge Impulse JSON
 mapping_file = "class_names.json"       # human-readable label mapping
-output_file = "labels.txt"              # Output labels.txt
+output_file = "ei_labels.txt"           # Output labels, one per line
+stats_file = "label_stats.json"         # Per-label counts and box sizes
 # --------------------------------------------
 
-# Load Edge Impulse JSON
-with open(ei_json_file) as f:
-    data = json.load(f)
+# Edge Impulse exports are streamed one sample at a time instead of being
+# loaded whole, so multi-GB exports are processed in constant memory.
+# ijson is used when installed; otherwise a small incremental reader built
+# on json.JSONDecoder.raw_decode does the same job.
 
-# Load human-readable mapping
-with open(mapping_file) as f:
-    mapping = json.load(f)
+CHUNK_SIZE = 1 << 16
+WHITESPACE = " \t\r\n"
 
-# Extract unique label IDs from bounding boxes
-label_ids = set()
-for sample in data.get("samples", []):
-    for box in sample.get("boundingBoxes", []):
-        label_ids.add(box["label"])
 
-label_ids = sorted(label_ids)
+# ================= STREAMING READER =================
+class _Reader:
+    # A sliding text buffer over the file, refilled on demand
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
 
-labels = []
-missing_labels = []
+    def fill(self):
+        data = self.f.read(self.chunk_size)
+        if not data:
+            self.eof = True
+            return False
+        # Drop what has been consumed, keep only the unparsed tail
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
 
-for i in label_ids:
-    key = str(i)
-    if key in mapping:
-        labels.append(mapping[key])
+    def peek(self):
+        # Next non-whitespace character, or None at end of file
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return None
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} at offset {self.pos} of buffer")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+                # A number at the very end of the buffer may continue in
+                # the next chunk
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill()
+
+
+def _iter_array(f, key, chunk_size=CHUNK_SIZE):
+    # Yields the elements of the array under top-level `key`
+    r = _Reader(f, chunk_size)
+    r.expect("{")
+    while r.peek() not in ("}", None):
+        name = r.value()
+        r.expect(":")
+        if name != key:
+            r.value()   # other top-level fields are small, e.g. "version"
+        elif r.peek() == "[":
+            r.expect("[")
+            while r.peek() != "]":
+                yield r.value()
+                if r.peek() == ",":
+                    r.expect(",")
+            r.expect("]")
+        if r.peek() == ",":
+            r.expect(",")
+
+
+def iter_samples(path, chunk_size=CHUNK_SIZE):
+    try:
+        import ijson
+    except ImportError:
+        ijson = None
+
+    if ijson is not None:
+        with open(path, "rb") as f:
+            yield from ijson.items(f, "samples.item", use_float=True)
+    else:
+        with open(path, encoding="utf-8") as f:
+            yield from _iter_array(f, "samples", chunk_size)
+
+
+# ================= STATISTICS =================
+class SizeStats:
+    # Running count / mean / std / min / max without keeping the values
+    __slots__ = ("count", "total", "total_sq", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, v):
+        self.count += 1
+        self.total += v
+        self.total_sq += v * v
+        self.min = min(self.min, v)
+        self.max = max(self.max, v)
+
+    def summary(self):
+        if not self.count:
+            return None
+        mean = self.total / self.count
+        var = max(0.0, self.total_sq / self.count - mean * mean)
+        return {"mean": round(mean, 1), "std": round(math.sqrt(var), 1),
+                "min": self.min, "max": self.max}
+
+
+class LabelStats:
+    __slots__ = ("boxes", "samples", "width", "height", "area")
+
+    def __init__(self):
+        self.boxes = 0
+        self.samples = 0
+        self.width = SizeStats()
+        self.height = SizeStats()
+        self.area = SizeStats()
+
+    def summary(self):
+        return {"boxes": self.boxes, "samples": self.samples,
+                "width": self.width.summary(), "height": self.height.summary(),
+                "area": self.area.summary()}
+
+
+def collect(samples):
+    # Returns ({label_id: LabelStats}, total_samples, samples_without_boxes)
+    stats = {}
+    total = 0
+    empty = 0
+    for sample in samples:
+        total += 1
+        boxes = sample.get("boundingBoxes") or []
+        if not boxes:
+            empty += 1
+        seen = set()
+        for box in boxes:
+            s = stats.get(box["label"])
+            if s is None:
+                s = stats[box["label"]] = LabelStats()
+            s.boxes += 1
+            w, h = box.get("w", 0), box.get("h", 0)
+            s.width.add(w)
+            s.height.add(h)
+            s.area.add(w * h)
+            if box["label"] not in seen:
+                seen.add(box["label"])
+                s.samples += 1
+    return stats, total, empty
+
+
+# ================= MAIN =================
+def main():
+    parser = argparse.ArgumentParser(description="Labels from an Edge Impulse export")
+    parser.add_argument("input", nargs="?", default=ei_json_file)
+    parser.add_argument("--mapping", default=mapping_file)
+    parser.add_argument("-o", "--output", default=output_file)
+    parser.add_argument("--stats", default=stats_file)
+    args = parser.parse_args()
+
+    stats, total, empty = collect(iter_samples(args.input))
+
+    # Load human-readable mapping
+    mapping = {}
+    if os.path.exists(args.mapping):
+        with open(args.mapping) as f:
+            mapping = json.load(f)
     else:
-        # Handle missing label safely
-        unknown_name = f"UNKNOWN_{i}"
-        labels.append(unknown_name)
-        missing_labels.append(i)
-
-# Write labels.txt
-with open(output_file, "w") as f:
-    for label in labels:
-        f.write(label + "\n")
-
-print(f"? labels.txt created: {output_file}")
-if missing_labels:
-    print("? WARNING: Missing mappings for label IDs:", missing_labels)
-    print("Please add them to class_names.json for correct human-readable names.")
-
-print("Labels in order:")
-for idx, name in zip(label_ids, labels):
-    print(f"{idx}: {name}")
+        print(f"? WARNING: {args.mapping} not found, labels will be UNKNOWN_<id>")
+
+    label_ids = sorted(stats)
+
+    labels = []
+    missing_labels = []
+
+    for i in label_ids:
+        key = str(i)
+        if key in mapping:
+            labels.append(mapping[key])
+        else:
+            # Handle missing label safely
+            unknown_name = f"UNKNOWN_{i}"
+            labels.append(unknown_name)
+            missing_labels.append(i)
+
+    # Write the label list
+    with open(args.output, "w") as f:
+        for label in labels:
+            f.write(label + "\n")
+
+    # Write per-label statistics
+    with open(args.stats, "w") as f:
+        json.dump({
+            "samples": total,
+            "samples_without_boxes": empty,
+            "labels": {str(i): {"name": name, **stats[i].summary()}
+                       for i, name in zip(label_ids, labels)},
+        }, f, indent=2)
+
+    print(f"? labels created: {args.output}")
+    if missing_labels:
+        print("? WARNING: Missing mappings for label IDs:", missing_labels)
+        print("Please add them to class_names.json for correct human-readable names.")
+
+    print(f"{total} samples ({empty} without boxes), stats in {args.stats}")
+    print("Labels in order:")
+    for idx, name in zip(label_ids, labels):
+        s = stats[idx]
+        w, h = s.width.summary(), s.height.summary()
+        print(f"{idx}: {name:<20} {s.boxes:6d} boxes in {s.samples:5d} samples, "
+              f"avg {w['mean']:.0f}x{h['mean']:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import argparse
+import base64
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+
+# ================= FAKE GOOGLE VISION =================
+# Minimal stand-in for the Vision REST endpoint (POST /v1/images:annotate)
+# so the online path can be exercised offline:
+#
+#   python fake_vision_server.py --port 8089
+#   VISION_ENDPOINT=http://127.0.0.1:8089 python image_detection_final.py
+#
+# Every image gets the same canned object and word, placed relative to the
+# uploaded image size, after an optional artificial delay.
+
+DEFAULT_OBJECT = "Apple"
+DEFAULT_TEXT = "APPLE"
+
+# The REST transport sends enums as integers
+FEATURE_NAMES = {5: "TEXT_DETECTION", 19: "OBJECT_LOCALIZATION"}
+
+
+def image_size(content):
+    data = np.frombuffer(base64.b64decode(content), np.uint8)
+    img = cv2.imdecode(data, cv2.IMREAD_GRAYSCALE)
+    if img is None:
+        return 640, 480
+    h, w = img.shape[:2]
+    return w, h
+
+
+def fake_response(request, object_name, text):
+    features = {FEATURE_NAMES.get(f.get("type"), f.get("type"))
+                for f in request.get("features", [])}
+    w, h = image_size(request.get("image", {}).get("content", ""))
+    res = {}
+
+    if "OBJECT_LOCALIZATION" in features:
+        res["localizedObjectAnnotations"] = [{
+            "name": object_name,
+            "score": 0.9,
+            "boundingPoly": {"normalizedVertices": [
+                {"x": 0.2, "y": 0.2}, {"x": 0.6, "y": 0.2},
+                {"x": 0.6, "y": 0.7}, {"x": 0.2, "y": 0.7},
+            ]},
+        }]
+
+    if "TEXT_DETECTION" in features:
+        x1, y1, x2, y2 = int(w * 0.65), int(h * 0.1), int(w * 0.9), int(h * 0.2)
+        poly = {"vertices": [
+            {"x": x1, "y": y1}, {"x": x2, "y": y1},
+            {"x": x2, "y": y2}, {"x": x1, "y": y2},
+        ]}
+        res["textAnnotations"] = [
+            {"description": text, "boundingPoly": poly},
+            {"description": text, "boundingPoly": poly},
+        ]
+
+    return res
+
+
+def make_handler(delay, object_name, text):
+    class Handler(BaseHTTPRequestHandler):
+        requests_served = 0
+
+        def do_POST(self):
+            if not self.path.startswith("/v1/images:annotate"):
+                self.send_error(404)
+                return
+
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if delay:
+                time.sleep(delay)
+
+            responses = [fake_response(r, object_name, text)
+                         for r in body.get("requests", [])]
+            Handler.requests_served += 1
+
+            payload = json.dumps({"responses": responses}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(port=8089, delay=0.0, object_name=DEFAULT_OBJECT, text=DEFAULT_TEXT):
+    # Starts the stub on a daemon thread and returns the server
+    server = ThreadingHTTPServer(("127.0.0.1", port),
+                                 make_handler(delay, object_name, text))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Google Vision server")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--delay", type=float, default=0.0,
+                        help="seconds to wait before answering")
+    parser.add_argument("--object", default=DEFAULT_OBJECT)
+    parser.add_argument("--text", default=DEFAULT_TEXT)
+    args = parser.parse_args()
+
+    server = serve(args.port, args.delay, args.object, args.text)
+    print(f"Fake Vision API on http://127.0.0.1:{server.server_port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from metrics import metrics
+
+
+# ================= FRAME GRABBER =================
+# Reads the camera on its own thread so the UI loop never blocks on
+# cap.read(). Frames are decoded straight into a preallocated ring buffer
+# and only the index of the newest slot is published.
+#
+# latest() hands out a view into the ring, not a copy. The slot it points
+# at is not rewritten until `slots - 1` newer frames have been grabbed, so
+# callers that keep a frame around longer than that should copy() it.
+#
+# After `max_failures` failed reads in a row (camera unplugged, end of a
+# recording) the grabber stops and sets `failed`; read() then returns
+# (False, None) like cv2.VideoCapture would.
+class FrameGrabber:
+    def __init__(self, cap, slots=4, fps_smoothing=0.9, max_failures=50):
+        self.cap = cap
+        self.slots = max(2, slots)
+        self.fps_smoothing = fps_smoothing
+        self.max_failures = max_failures
+
+        # Keep the driver queue short so we always see the newest frame
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        self.ring = None
+        self.cond = threading.Condition()
+        self.index = -1
+        self.seq = 0
+        self.read_seq = 0
+
+        self.grabbed = 0
+        self.dropped = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.failed = False
+        self.fps = 0.0
+        self._last_time = None
+
+        self.running = False
+        self.thread = None
+
+    # ---------- lifecycle ----------
+    def start(self):
+        if self.running:
+            return self
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="grabber",
+                                       daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        with self.cond:
+            self.cond.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+
+    # ---------- grab loop ----------
+    def _allocate(self, frame):
+        self.ring = np.empty((self.slots,) + frame.shape, dtype=frame.dtype)
+        self.ring[0] = frame
+        return 0
+
+    def _run(self):
+        while self.running:
+            if self.ring is None:
+                with metrics.timer("camera_read"):
+                    ret, frame = self.cap.read()
+                if not ret:
+                    self._failed()
+                    continue
+                slot = self._allocate(frame)
+            else:
+                slot = (self.index + 1) % self.slots
+                out = self.ring[slot]
+                with metrics.timer("camera_read"):
+                    ret, frame = self.cap.read(out)
+                if not ret:
+                    self._failed()
+                    continue
+                if frame.shape != out.shape:
+                    # Resolution changed under us
+                    slot = self._allocate(frame)
+                elif frame is not out:
+                    # Backend ignored the output buffer
+                    out[...] = frame
+
+            self._publish(slot)
+
+    def _failed(self):
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= self.max_failures:
+            with self.cond:
+                self.failed = True
+                self.running = False
+                self.cond.notify_all()
+            return
+        time.sleep(0.01)
+
+    def _publish(self, slot):
+        now = time.perf_counter()
+        if self._last_time is not None:
+            dt = now - self._last_time
+            if dt > 0:
+                inst = 1.0 / dt
+                if self.fps == 0.0:
+                    self.fps = inst
+                else:
+                    a = self.fps_smoothing
+                    self.fps = a * self.fps + (1 - a) * inst
+        self._last_time = now
+        self.consecutive_failures = 0
+
+        with self.cond:
+            if self.seq > self.read_seq:
+                # Previous frame was never picked up by anyone
+                self.dropped += 1
+            self.index = slot
+            self.seq += 1
+            self.grabbed += 1
+            self.cond.notify_all()
+
+    # ---------- consumers ----------
+    def latest(self):
+        # Returns (seq, frame) for the newest frame, or (0, None) if none yet
+        with self.cond:
+            if self.index < 0:
+                return 0, None
+            self.read_seq = self.seq
+            return self.seq, self.ring[self.index]
+
+    def wait(self, after_seq=0, timeout=1.0):
+        # Blocks until a frame newer than `after_seq` is available
+        with self.cond:
+            self.cond.wait_for(
+                lambda: self.seq > after_seq or not self.running,
+                timeout=timeout
+            )
+        return self.latest()
+
+    def read(self):
+        # cv2.VideoCapture-style accessor for code that wants (ret, frame)
+        seq, frame = self.wait(self.read_seq)
+        if self.failed:
+            return False, None
+        return frame is not None, frame
+
+    def stats(self):
+        return {
+            "fps": round(self.fps, 1),
+            "grabbed": self.grabbed,
+            "dropped": self.dropped,
+            "failures": self.failures,
+            "failed": self.failed,
+        }
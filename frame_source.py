@@ -0,0 +1,233 @@
+import argparse
+import mmap
+import os
+import time
+
+import cv2
+import numpy as np
+
+
+# ================= FRAME SOURCES =================
+# Everything that needs a camera opens it through open_source(), which
+# returns an object with the cv2.VideoCapture methods the apps use (read,
+# set, get, isOpened, release):
+#
+#   CAMERA_SOURCE=0                 webcam 0 (default)
+#   CAMERA_SOURCE=session.mjpg      replay a recording
+#   CAMERA_SPEED=native|max|<x>     replay at recorded pace, flat out, or x times
+#   CAMERA_RECORD=session.mjpg      record the live camera while running
+#
+# Recordings are MJPEG: the JPEG frames back to back in <name>.mjpg, plus
+# <name>.idx with one (offset, size, timestamp) record per frame. Replay
+# memory-maps the .mjpg and decodes frames straight out of the map, so a
+# recorded session runs through update_video() / run_detection() with no
+# camera attached, at the pace it was recorded or as fast as it decodes.
+#
+#   python frame_source.py record session.mjpg --seconds 30
+#   python frame_source.py info session.mjpg
+
+INDEX = np.dtype([("offset", "<u8"), ("size", "<u4"), ("time", "<f8")])
+
+
+def index_path(path):
+    return os.path.splitext(path)[0] + ".idx"
+
+
+# ================= RECORDING =================
+class RecordingSource:
+    # Wraps a capture and appends every frame it returns to a recording
+    def __init__(self, cap, path, quality=90):
+        self.cap = cap
+        self.path = path
+        self.quality = quality
+        self.data = open(path, "wb")
+        self.index = open(index_path(path), "wb")
+        self.offset = 0
+        self.frames = 0
+
+    def read(self, out=None):
+        ret, frame = self.cap.read(out) if out is not None else self.cap.read()
+        if ret:
+            self._write(frame)
+        return ret, frame
+
+    def _write(self, frame):
+        ok, buf = cv2.imencode(".jpg", frame,
+                               [int(cv2.IMWRITE_JPEG_QUALITY), self.quality])
+        if not ok:
+            return
+        entry = np.array([(self.offset, len(buf), time.monotonic())], INDEX)
+        self.data.write(buf.tobytes())
+        # Index last: a frame only counts once its bytes are on disk
+        self.index.write(entry.tobytes())
+        self.offset += len(buf)
+        self.frames += 1
+        if self.frames % 30 == 0:
+            self.data.flush()
+            self.index.flush()
+
+    def set(self, prop, value):
+        return self.cap.set(prop, value)
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def release(self):
+        self.cap.release()
+        if not self.data.closed:
+            self.data.close()
+            self.index.close()
+            print(f"Recorded {self.frames} frames to {self.path}")
+
+
+# ================= REPLAY =================
+class ReplaySource:
+    # speed: 1.0 = recorded pace, 2.0 = twice as fast, 0 = as fast as possible
+    def __init__(self, path, speed=1.0, loop=False):
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self.index = np.fromfile(index_path(path), INDEX)
+        if not len(self.index):
+            raise ValueError(f"Empty recording: {path}")
+
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.pos = 0
+        self.start = None
+
+        first = self._decode(0)
+        self.height, self.width = first.shape[:2]
+        times = self.index["time"]
+        duration = times[-1] - times[0]
+        self.fps = (len(times) - 1) / duration if duration > 0 else 0.0
+
+    def _decode(self, i):
+        offset, size = int(self.index[i]["offset"]), int(self.index[i]["size"])
+        buf = np.frombuffer(self.data, np.uint8, size, offset)
+        return cv2.imdecode(buf, cv2.IMREAD_COLOR)
+
+    def read(self, out=None):
+        if self.pos >= len(self.index):
+            if not self.loop:
+                return False, None
+            self.pos = 0
+            self.start = None
+
+        if self.speed:
+            # Hold each frame back to its recorded time
+            t = self.index[self.pos]["time"] - self.index[0]["time"]
+            now = time.perf_counter()
+            if self.start is None:
+                self.start = now - t / self.speed
+            delay = self.start + t / self.speed - now
+            if delay > 0:
+                time.sleep(delay)
+
+        frame = self._decode(self.pos)
+        self.pos += 1
+        if frame is None:
+            return False, None
+        if out is not None and out.shape == frame.shape:
+            out[...] = frame
+            frame = out
+        return True, frame
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            self.pos = max(0, min(int(value), len(self.index)))
+            self.start = None
+            return True
+        # Size, buffer length and the like are fixed by the recording
+        return False
+
+    def get(self, prop):
+        return {
+            cv2.CAP_PROP_FRAME_WIDTH: self.width,
+            cv2.CAP_PROP_FRAME_HEIGHT: self.height,
+            cv2.CAP_PROP_FPS: self.fps,
+            cv2.CAP_PROP_FRAME_COUNT: len(self.index),
+            cv2.CAP_PROP_POS_FRAMES: self.pos,
+        }.get(prop, 0.0)
+
+    def isOpened(self):
+        return not self.data.closed
+
+    def release(self):
+        if not self.data.closed:
+            self.data.close()
+            self.file.close()
+
+
+# ================= FACTORY =================
+def parse_speed(value):
+    if value in (None, "", "native"):
+        return 1.0
+    if value == "max":
+        return 0.0
+    return float(value)
+
+
+def open_source(source=None, width=None, height=None, speed=None, record=None,
+                loop=True):
+    # Defaults come from CAMERA_SOURCE / CAMERA_SPEED / CAMERA_RECORD
+    source = source if source is not None else os.environ.get("CAMERA_SOURCE", "0")
+    record = record if record is not None else os.environ.get("CAMERA_RECORD")
+
+    if str(source).isdigit():
+        cap = cv2.VideoCapture(int(source))
+        if width:
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        if height:
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    elif str(source).endswith(".mjpg"):
+        speed = speed if speed is not None else parse_speed(os.environ.get("CAMERA_SPEED"))
+        cap = ReplaySource(source, speed, loop)
+    else:
+        # Video files and stream URLs
+        cap = cv2.VideoCapture(source)
+
+    if record:
+        cap = RecordingSource(cap, record)
+    return cap
+
+
+# ================= CLI =================
+def main():
+    parser = argparse.ArgumentParser(description="Record or inspect camera sessions")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="record a camera to an .mjpg recording")
+    rec.add_argument("output")
+    rec.add_argument("--camera", default="0")
+    rec.add_argument("--seconds", type=float, default=10.0)
+    rec.add_argument("--width", type=int, default=640)
+    rec.add_argument("--height", type=int, default=480)
+
+    info = sub.add_parser("info", help="describe a recording")
+    info.add_argument("recording")
+
+    args = parser.parse_args()
+
+    if args.command == "record":
+        cap = open_source(args.camera, args.width, args.height, record=args.output)
+        end = time.monotonic() + args.seconds
+        while time.monotonic() < end:
+            ret, _ = cap.read()
+            if not ret:
+                break
+        cap.release()
+    else:
+        src = ReplaySource(args.recording)
+        size = os.path.getsize(args.recording)
+        count = len(src.index)
+        print(f"{count} frames, {src.width}x{src.height}, {src.fps:.1f} fps, "
+              f"{size / count / 1024:.1f} KB/frame")
+        src.release()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,36 @@
-import cv2
 import tkinter as tk
 from tkinter import Label, Button, Frame, Text, Scrollbar
-from PIL import Image, ImageTk
-from google.cloud import vision
-import pyttsx3
-import queue
-import numpy as np
+from burst import best_frame
+from detection_worker import DetectionWorker
+from frame_grabber import FrameGrabber
+from frame_source import open_source
+from vision_batch import make_client, annotate
+from result_cache import ResultCache, signature
+from scene_gate import SceneGate
+from metrics import metrics
+from speech_service import SpeechService
+from preview_renderer import PreviewRenderer
+from results import DetectionResult
 
 # ================= GOOGLE VISION =================
-vision_client = vision.ImageAnnotatorClient()
+vision_client = make_client()
+
+# Uploads are downscaled and re-encoded before they leave the device
+JPEG_QUALITY = 85
+UPLOAD_MAX_SIDE = 640
+
+# ================= RESULT CACHE =================
+result_cache = ResultCache("detection_cache.db")
+scene_gate = SceneGate()
 
 # ================= CAMERA =================
-cap = cv2.VideoCapture(0)
+cap = open_source()
+grabber = FrameGrabber(cap).start()
 
 # ================= STATE =================
 paused = False
 last_frame = None
+last_seq = 0
 
 # ================= TKINTER =================
 root = tk.Tk()
@@ -30,6 +45,7 @@ video_frame.pack(fill="both", expand=True)
 
 video_label = Label(video_frame, bg="black")
 video_label.pack(fill="both", expand=True)
+preview = PreviewRenderer(video_label, max_fps=20)
 
 # ================= CONTROL FRAME =================
 control_frame = Frame(root, bg="black")
@@ -60,37 +76,15 @@ capture_button = Button(
 )
 capture_button.pack(side="right", padx=10, pady=5, fill="y")
 
-# ================= SPEECH (MAIN THREAD SAFE) =================
-speech_queue = queue.Queue()
-speaking = False
-
-def process_speech_queue():
-    global speaking
-
-    if not speaking and not speech_queue.empty():
-        text = speech_queue.get()
-        speaking = True
-        try:
-            engine = pyttsx3.init()
-            engine.say(text)
-            engine.runAndWait()
-            engine.stop()
-        except Exception as e:
-            print("Speech error:", e)
-        speaking = False
-
-    root.after(100, process_speech_queue)
-
-root.after(100, process_speech_queue)
+# ================= SPEECH =================
+# One engine on its own thread: a new result interrupts the previous one
+speech = SpeechService()
+speech.start()
+speech.prerender(["Objects: None\nText: None"])
 
 # ================= DISPLAY =================
-def show_frame(frame):
-    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    frame = cv2.resize(frame, (640, 480))
-    img = Image.fromarray(frame)
-    imgtk = ImageTk.PhotoImage(img)
-    video_label.imgtk = imgtk
-    video_label.config(image=imgtk)
+def show_frame(frame, force=False):
+    preview.render(frame, 640, 480, force)
 
 # ================= STATUS =================
 def update_status(msg):
@@ -102,15 +96,16 @@ def update_status(msg):
 
 # ================= LIVE VIDEO =================
 def update_video():
-    global last_frame
+    global last_frame, last_seq
 
     if not paused:
-        ret, frame = cap.read()
-        if ret:
-            last_frame = frame.copy()
+        seq, frame = grabber.latest()
+        if frame is not None and seq != last_seq:
+            last_seq = seq
+            last_frame = frame
             show_frame(frame)
 
-    root.after(30, update_video)
+    root.after(15, update_video)
 
 # ================= CAPTURE BUTTON HANDLER =================
 def on_capture():
@@ -121,73 +116,55 @@ def on_capture():
         run_detection()
     else:
         paused = False
+        detection_worker.cancel()
         update_status("Ready")
 
 # ================= DETECTION =================
+detection_worker = DetectionWorker(root)
+
 def run_detection():
     global last_frame
 
     if last_frame is None:
         return
 
-    frame = last_frame.copy()
     update_status("Detecting...")
-
-    _, buffer = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), 85])
-    image = vision.Image(content=buffer.tobytes())
-
-    # Object detection
-    objects = vision_client.object_localization(image=image)\
-                           .localized_object_annotations
-
-    # OCR
-    texts = vision_client.text_detection(image=image)\
-                         .text_annotations
-    ocr_items = texts[1:] if len(texts) > 1 else []
-
-    detected_objects = []
-    detected_texts = []
+    detection_worker.submit(burst_detect,
+                            on_result=on_detection_done,
+                            on_error=on_detection_error)
+
+# Runs on the detection worker thread: no Tk calls in here
+def burst_detect():
+    # Sharpest of a short burst rather than whatever frame was on screen
+    frame = best_frame(grabber)
+    if frame is None:
+        raise RuntimeError("no camera frame")
+    return scene_gate.run(frame, "ONLINE", detect, frame)
+
+def detect(frame):
+    key = signature(frame)
+    cached = result_cache.get(key, "ONLINE")
+    if cached is not None:
+        return cached.draw(frame), cached
+
+    frame, result = vision_detect(frame)
+    result_cache.put(key, "ONLINE", result)
+    return frame, result
+
+def vision_detect(frame):
+    # Object detection + OCR in a single round-trip
+    res = annotate(vision_client, frame, JPEG_QUALITY, UPLOAD_MAX_SIDE)
 
     h, w, _ = frame.shape
+    result = DetectionResult.from_vision(res, (w, h))
 
-    # Draw object boxes (GREEN)
-    for obj in objects:
-        verts = obj.bounding_poly.normalized_vertices
-        if len(verts) < 4:
-            continue
-
-        x1 = int(verts[0].x * w)
-        y1 = int(verts[0].y * h)
-        x2 = int(verts[2].x * w)
-        y2 = int(verts[2].y * h)
-
-        detected_objects.append(obj.name)
-
-        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-        cv2.putText(frame, obj.name, (x1, max(y1 - 6, 15)),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+    # Objects in GREEN, text in BLUE
+    return result.draw(frame), result
 
-    # Draw text boxes (BLUE)
-    for text in ocr_items:
-        pts = []
-        for v in text.bounding_poly.vertices:
-            if v.x is not None and v.y is not None:
-                pts.append([v.x, v.y])
-
-        if len(pts) < 4:
-            continue
-
-        pts = np.array(pts, dtype=np.int32)
-        cv2.polylines(frame, [pts], True, (255, 0, 0), 2)
-
-        label = text.description.strip()
-        if label:
-            detected_texts.append(label)
-            x, y = pts[0]
-            cv2.putText(frame, label[:15], (x, max(y - 6, 15)),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 2)
-
-    show_frame(frame)
+def on_detection_done(done):
+    frame, result = done
+    detected_objects, detected_texts = result.objects, result.texts
+    show_frame(frame, force=True)
 
     message = "Objects: "
     message += ", ".join(detected_objects) if detected_objects else "None"
@@ -196,12 +173,19 @@ def run_detection():
 
     update_status(message)
 
-    while not speech_queue.empty():
-        speech_queue.get_nowait()
-    speech_queue.put(message)
+    speech.say(message)
+
+def on_detection_error(error):
+    print("Detection error:", error)
+    update_status("Detection failed")
 
 # ================= EXIT =================
 def on_close():
+    detection_worker.shutdown()
+    speech.stop()
+    grabber.stop()
+    metrics.report(camera=grabber.stats(), scene_gate=scene_gate.stats())
+    result_cache.close()
     cap.release()
     root.destroy()
 
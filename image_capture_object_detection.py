@@ -1,21 +1,28 @@
-import cv2
 import tkinter as tk
 from tkinter import Label, Button, Frame, Text, Scrollbar
-from PIL import Image, ImageTk
-from ultralytics import YOLO
+from detector_backends import make_detector
 import easyocr
-import pyttsx3
-import threading
-import queue
+from burst import best_frame
+from detection_worker import DetectionWorker
+from scene_gate import SceneGate
+from metrics import metrics
+from frame_grabber import FrameGrabber
+from frame_source import open_source
+from text_regions import read_text
+from speech_service import SpeechService
+from preview_renderer import PreviewRenderer
+import overlay
 
 # ================= YOLO =================
-model = YOLO("yolov8n.pt")
+model = make_detector()  # DETECTOR_BACKEND / DETECTOR_WEIGHTS pick the runner
 
 # ================= EASYOCR =================
 reader = easyocr.Reader(['en'], gpu=False)
 
 # ================= CAMERA =================
-cap = cv2.VideoCapture(0)
+cap = open_source()
+grabber = FrameGrabber(cap).start()
+last_seq = 0
 
 # ================= TKINTER =================
 root = tk.Tk()
@@ -30,6 +37,7 @@ video_frame.pack(fill="both", expand=True)
 
 video_label = Label(video_frame, bg="black")
 video_label.pack(expand=True)
+preview = PreviewRenderer(video_label, max_fps=30)
 
 # ================= STATUS AREA =================
 status_frame = Frame(root, bg="black", height=160)
@@ -53,65 +61,36 @@ scrollbar.config(command=status_text.yview)
 status_text.config(state="disabled")
 
 # ================= SPEECH =================
-speech_queue = queue.Queue()
-
-def speech_worker():
-    while True:
-        text = speech_queue.get()
-        if text is None:
-            break
-
-        # Each message gets its own thread for non-blocking speech
-        def speak(text_to_speak):
-            engine = pyttsx3.init()
-            engine.say(text_to_speak)
-            engine.runAndWait()
-            engine.stop()
-
-        threading.Thread(target=speak, args=(text,), daemon=True).start()
-
-# Start speech worker thread
-threading.Thread(target=speech_worker, daemon=True).start()
+# One engine on its own thread: a new result interrupts the previous one
+speech = SpeechService()
+speech.start()
 
 # ================= DRAW YOLO =================
-def draw_boxes(frame, results):
-    names = []
-    r = results[0]
-    for box in r.boxes:
-        x1, y1, x2, y2 = map(int, box.xyxy[0])
-        cls = int(box.cls[0])
-        conf = float(box.conf[0])
-
-        label = f"{r.names[cls]} {conf:.2f}"
-        names.append(r.names[cls])
-
-        cv2.rectangle(frame, (x1,y1), (x2,y2), (0,255,0), 2)
-        cv2.putText(frame, label, (x1, y1-5),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,255,0), 2)
+def draw_boxes(frame, dets):
+    names = dets.labels()
+    labels = [f"{name} {conf:.2f}" for name, conf in zip(names, dets.scores.tolist())]
+    overlay.draw_boxes(frame, dets.boxes, labels)
     return frame, names
 
-# ================= EASYOCR (FULL FRAME) =================
+# ================= EASYOCR (TEXT REGIONS ONLY) =================
 def detect_text(frame):
     texts = []
-    results = reader.readtext(frame)
+    results = read_text(reader, frame)
     for _, text, conf in results:
         if conf > 0.4:
             texts.append(text)
     return texts
 
 # ================= DISPLAY =================
-def show_frame(frame):
-    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    frame = cv2.resize(frame, (1150, 750))
-    img = Image.fromarray(frame)
-    imgtk = ImageTk.PhotoImage(img)
-    video_label.imgtk = imgtk
-    video_label.config(image=imgtk)
+def show_frame(frame, force=False):
+    preview.render(frame, 1150, 750, force)
 
 # ================= LIVE VIDEO =================
 def update_video():
-    ret, frame = cap.read()
-    if ret:
+    global last_seq
+    seq, frame = grabber.latest()
+    if frame is not None and seq != last_seq:
+        last_seq = seq
         show_frame(frame)
     root.after(10, update_video)
 
@@ -124,19 +103,40 @@ def update_status(msg):
     status_text.config(state="disabled")
 
 # ================= CAPTURE =================
+detection_worker = DetectionWorker(root)
+# Capturing the same scene again -> reuse the previous result
+scene_gate = SceneGate()
+
 def capture_predict():
-    ret, frame = cap.read()
-    if not ret:
+    seq, frame = grabber.latest()
+    if frame is None:
         update_status("Camera error")
         return
 
     update_status("Detecting...")
-
-    results = model(frame)
+    detection_worker.submit(burst_predict,
+                            on_result=on_predict_done,
+                            on_error=on_predict_error)
+
+# Runs on the detection worker thread: no Tk calls in here
+def burst_predict():
+    # Sharpest of a short burst rather than whatever frame was on screen
+    frame = best_frame(grabber)
+    if frame is None:
+        raise RuntimeError("no camera frame")
+    return scene_gate.run(frame, None, predict, frame)
+
+def predict(frame):
+    with metrics.timer("yolo"):
+        results = model(frame)
     frame, objects = draw_boxes(frame, results)
     texts = detect_text(frame)
+    return frame, objects, texts
 
-    show_frame(frame)
+def on_predict_done(result):
+    frame, objects, texts = result
+
+    show_frame(frame, force=True)
 
     message = ""
     if objects:
@@ -150,7 +150,11 @@ def capture_predict():
         message = "Nothing detected"
 
     update_status(message)
-    speech_queue.put(message)
+    speech.say(message)
+
+def on_predict_error(error):
+    print("Detection error:", error)
+    update_status("Detection failed")
 
 # ================= BUTTON =================
 Button(
@@ -169,7 +173,10 @@ update_video()
 
 # ================= EXIT =================
 def on_close():
-    speech_queue.put(None)
+    detection_worker.shutdown()
+    speech.stop()
+    grabber.stop()
+    metrics.report(camera=grabber.stats(), scene_gate=scene_gate.stats())
     cap.release()
     root.destroy()
 
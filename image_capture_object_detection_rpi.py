@@ -1,21 +1,29 @@
 import cv2
 import tkinter as tk
 from tkinter import Label, Button, Frame, Text, Scrollbar
-from PIL import Image, ImageTk
-from ultralytics import YOLO
+from detector_backends import make_detector
 import easyocr
-import pyttsx3
-import threading
-import queue
+from burst import best_frame
+from detection_worker import DetectionWorker
+from scene_gate import SceneGate
+from metrics import metrics
+from frame_grabber import FrameGrabber
+from frame_source import open_source
+from text_regions import read_text
+from speech_service import SpeechService
+from preview_renderer import PreviewRenderer
+import overlay
 
 # ================= YOLO =================
-model = YOLO("yolov8l.pt")  # Nano model for Raspberry Pi CPU
+model = make_detector()  # Nano model, ONNX Runtime on ARM when exported
 
 # ================= EASYOCR =================
 reader = easyocr.Reader(['en'], gpu=False)
 
 # ================= CAMERA =================
-cap = cv2.VideoCapture(0)
+cap = open_source()
+grabber = FrameGrabber(cap).start()
+last_seq = 0
 
 # ================= TKINTER =================
 root = tk.Tk()
@@ -30,6 +38,7 @@ video_frame.pack(fill="both", expand=True)
 
 video_label = Label(video_frame, bg="black")
 video_label.pack(fill="both", expand=True)
+preview = PreviewRenderer(video_label, max_fps=20)
 
 # ================= STATUS + BUTTON FRAME =================
 control_frame = Frame(root, bg="black")
@@ -55,7 +64,7 @@ status_text.config(yscrollcommand=scrollbar.set)
 capture_button = Button(
     control_frame,
     text="CAPTURE",
-    command=lambda: threading.Thread(target=capture_predict, daemon=True).start(),
+    command=lambda: capture_predict(),
     font=("Arial", 24, "bold"),
     bg="green",
     fg="white"
@@ -63,65 +72,38 @@ capture_button = Button(
 capture_button.pack(side="right", padx=10, pady=5, fill="y")
 
 # ================= SPEECH =================
-speech_queue = queue.Queue()
-
-def speech_worker():
-    while True:
-        text = speech_queue.get()
-        if text is None:
-            break
-
-        def speak(text_to_speak):
-            engine = pyttsx3.init()
-            engine.say(text_to_speak)
-            engine.runAndWait()
-            engine.stop()
-
-        threading.Thread(target=speak, args=(text,), daemon=True).start()
-
-threading.Thread(target=speech_worker, daemon=True).start()
+# One engine on its own thread: a new result interrupts the previous one
+speech = SpeechService()
+speech.start()
 
 # ================= DRAW YOLO =================
-def draw_boxes(frame, results):
-    names = []
-    r = results[0]
-    for box in r.boxes:
-        x1, y1, x2, y2 = map(int, box.xyxy[0])
-        cls = int(box.cls[0])
-        conf = float(box.conf[0])
-
-        label = f"{r.names[cls]} {conf:.2f}"
-        names.append(r.names[cls])
-
-        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-        cv2.putText(frame, label, (x1, y1 - 5),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+def draw_boxes(frame, dets):
+    names = dets.labels()
+    labels = [f"{name} {conf:.2f}" for name, conf in zip(names, dets.scores.tolist())]
+    overlay.draw_boxes(frame, dets.boxes, labels)
     return frame, names
 
 # ================= EASYOCR =================
 def detect_text(frame):
     texts = []
-    results = reader.readtext(frame)
+    results = read_text(reader, frame)
     for _, text, conf in results:
         if conf > 0.4:
             texts.append(text)
     return texts
 
 # ================= DISPLAY =================
-def show_frame(frame):
-    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    frame = cv2.resize(frame, (640, 480))
-    img = Image.fromarray(frame)
-    imgtk = ImageTk.PhotoImage(img)
-    video_label.imgtk = imgtk
-    video_label.config(image=imgtk)
+def show_frame(frame, force=False):
+    preview.render(frame, 640, 480, force)
 
 # ================= LIVE VIDEO =================
 def update_video():
-    ret, frame = cap.read()
-    if ret:
+    global last_seq
+    seq, frame = grabber.latest()
+    if frame is not None and seq != last_seq:
+        last_seq = seq
         show_frame(frame)
-    root.after(30, update_video)  # slower refresh to reduce CPU load
+    root.after(15, update_video)
 
 # ================= STATUS =================
 def update_status(msg):
@@ -132,27 +114,48 @@ def update_status(msg):
     status_text.config(state="disabled")
 
 # ================= CAPTURE =================
-# ================= CAPTURE =================
+detection_worker = DetectionWorker(root)
+# Capturing the same scene again -> reuse the previous result
+scene_gate = SceneGate()
+
 def capture_predict():
-    ret, frame = cap.read()
-    if not ret:
+    seq, frame = grabber.latest()
+    if frame is None:
         update_status("Camera error")
         return
 
     update_status("Detecting...")
-
+    detection_worker.submit(burst_predict,
+                            on_result=on_predict_done,
+                            on_error=on_predict_error)
+
+# Runs on the detection worker thread: no Tk calls in here
+def burst_predict():
+    # Sharpest of a short burst rather than whatever frame was on screen
+    frame = best_frame(grabber)
+    if frame is None:
+        raise RuntimeError("no camera frame")
+    return scene_gate.run(frame, None, predict, frame)
+
+def predict(frame):
     # Resize frame for faster processing
     small_frame = cv2.resize(frame, (640, 480))
 
     # YOLO detection (objects only)
-    results = model(small_frame)
+    with metrics.timer("yolo"):
+        results = model(small_frame)
     frame_with_boxes, objects = draw_boxes(small_frame.copy(), results)  # draw boxes on copy
 
     # EasyOCR detection (text only)
     texts = detect_text(frame)  # <-- Use original frame for OCR
 
+    return frame_with_boxes, objects, texts
+
+def on_predict_done(result):
+    frame_with_boxes, objects, texts = result
+
     # Show frame with YOLO boxes
-    show_frame(frame_with_boxes)
+    show_frame(frame_with_boxes, force=True)
 
     # Build message
     message = ""
@@ -168,7 +171,11 @@ def capture_predict():
 
     # Update status and speak
     update_status(message)
-    speech_queue.put(message)
+    speech.say(message)
+
+def on_predict_error(error):
+    print("Detection error:", error)
+    update_status("Detection failed")
 
 
 # ================= START =================
@@ -176,7 +183,10 @@ update_video()
 
 # ================= EXIT =================
 def on_close():
-    speech_queue.put(None)
+    detection_worker.shutdown()
+    speech.stop()
+    grabber.stop()
+    metrics.report(camera=grabber.stats(), scene_gate=scene_gate.stats())
     cap.release()
     root.destroy()
 
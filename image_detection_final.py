@@ -1,45 +1,51 @@
-import cv2
+# Imported first so the startup clock starts as early as possible
+from models import startup
 import tkinter as tk
 from tkinter import Frame, Label, Button, Text, Scrollbar
-from PIL import Image, ImageTk
-from google.cloud import vision
-import pyttsx3
-import queue
-import numpy as np
-import socket
+import time
+from burst import best_frame
+from detection_worker import DetectionWorker
+from frame_grabber import FrameGrabber
+from frame_source import open_source
+from result_cache import ResultCache, signature
+from scene_gate import SceneGate
+from connectivity import ConnectivityMonitor
+from detection import (yolo_model, run_yolo, preload_models, offline_detect,
+                       online_detect)
+from live_tracking import DetectionScheduler, IoUTracker
+from overlay import Overlay
+from speech_service import SpeechService
+from preview_renderer import PreviewRenderer
+from metrics import metrics
 
 # ================= INTERNET CHECK =================
-def internet_available(timeout=2):
-    try:
-        socket.setdefaulttimeout(timeout)
-        socket.gethostbyname("google.com")
-        return True
-    except:
-        return False
+# Probed in the background; AUTO mode reads the cached state and the
+# measured latency of each backend instead of blocking on DNS
+connectivity = ConnectivityMonitor().start()
 
-# ================= OFFLINE MODELS =================
-from ultralytics import YOLO
-import easyocr
-
-yolo_model = YOLO("yolov8n.pt")
-ocr_reader = easyocr.Reader(['en'], gpu=False)
-
-# ================= GOOGLE VISION =================
-vision_client = vision.ImageAnnotatorClient()
+# ================= RESULT CACHE =================
+# Same scene within a few hash bits -> reuse the stored result
+result_cache = ResultCache("detection_cache.db")
+# Capturing the same scene again -> reuse the previous result from memory
+scene_gate = SceneGate()
 
 # ================= CAMERA =================
-cap = cv2.VideoCapture(0)
-cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+# Webcam 0 unless CAMERA_SOURCE points at a recording, see frame_source.py
+cap = open_source(width=640, height=480)
+grabber = FrameGrabber(cap).start()
 
 # ================= APP STATE =================
 paused = False
+live = False
+show_stats = False
 last_frame = None
+last_seq = 0
 MODE = "AUTO"
 
 # ================= TKINTER =================
 root = tk.Tk()
 root.title("Vision Capture")
+startup.mark("window")
 
 # IMPORTANT: RESIZABLE WINDOW (NO FULLSCREEN)
 root.resizable(True, True)
@@ -51,6 +57,7 @@ root.grid_rowconfigure(1, weight=0)   # controls
 root.grid_columnconfigure(0, weight=1)
 
 CONTROL_HEIGHT = 140
+DISPLAY_FPS = 20   # preview redraw cap, independent of camera FPS
 current_video_width = 800
 current_video_height = 480 - CONTROL_HEIGHT
 
@@ -60,6 +67,7 @@ video_frame.grid(row=0, column=0, sticky="nsew")
 
 video_label = Label(video_frame, bg="black")
 video_label.pack(fill="both", expand=True)
+preview = PreviewRenderer(video_label, max_fps=DISPLAY_FPS)
 
 # ================= CONTROL BAR =================
 control_frame = Frame(root, bg="black", height=CONTROL_HEIGHT)
@@ -97,6 +105,7 @@ def on_capture():
         run_detection()
     else:
         paused = False
+        detection_worker.cancel()
         update_status("Ready")
 
 capture_button = Button(
@@ -114,6 +123,7 @@ def toggle_mode():
     global MODE
     MODE = {"AUTO": "ONLINE", "ONLINE": "OFFLINE", "OFFLINE": "AUTO"}[MODE]
     mode_label.config(text=f"MODE: {MODE}")
+    preload_models(MODE)
 
 mode_button = Button(
     button_frame,
@@ -126,6 +136,45 @@ mode_button = Button(
 )
 mode_button.grid(row=0, column=1, padx=5)
 
+def toggle_live():
+    global live
+    live = not live
+    live_button.config(bg="orange" if live else "gray")
+    if live:
+        yolo_model.preload()
+    else:
+        live_worker.cancel()
+        live_scheduler.cancel()
+        live_tracker.clear()
+
+live_button = Button(
+    button_frame,
+    text="LIVE",
+    font=("Arial", 14, "bold"),
+    bg="gray",
+    fg="white",
+    width=6,
+    command=toggle_live
+)
+live_button.grid(row=0, column=2, padx=5)
+
+def toggle_stats():
+    global show_stats
+    show_stats = not show_stats
+    stats_button.config(bg="orange" if show_stats else "gray")
+    refresh_overlay()
+
+stats_button = Button(
+    button_frame,
+    text="STATS",
+    font=("Arial", 14, "bold"),
+    bg="gray",
+    fg="white",
+    width=6,
+    command=toggle_stats
+)
+stats_button.grid(row=0, column=3, padx=5)
+
 mode_label = Label(
     button_frame,
     text="MODE: AUTO",
@@ -133,33 +182,13 @@ mode_label = Label(
     fg="yellow",
     bg="black"
 )
-mode_label.grid(row=1, column=0, columnspan=2, pady=4)
+mode_label.grid(row=1, column=0, columnspan=4, pady=4)
 
 # ================= SPEECH =================
-speech_queue = queue.Queue()
-speaking = False
-
-def process_speech_queue():
-    global speaking
-    if not speaking and not speech_queue.empty():
-        text = speech_queue.get()
-        speaking = True
-        # engine = pyttsx3.init()
-        # engine.say(text)
-        # engine.runAndWait()
-        # engine.stop()
-        engine = pyttsx3.init()
-
-        rate = engine.getProperty('rate')
-        engine.setProperty('rate', rate - 40)  # lower = slower speech
-
-        engine.say(text)
-        engine.runAndWait()
-        engine.stop()
-        speaking = False
-    root.after(100, process_speech_queue)
-
-root.after(100, process_speech_queue)
+# One engine on its own thread: a new result interrupts the previous one
+speech = SpeechService(rate_delta=-40)  # lower = slower speech
+speech.start()
+speech.prerender(["Objects: None\nText: None"])
 
 # ================= RESIZE HANDLER =================
 def on_resize(event):
@@ -172,15 +201,17 @@ def on_resize(event):
 root.bind("<Configure>", on_resize)
 
 # ================= UI HELPERS =================
-def show_frame(frame):
-    if current_video_width <= 1 or current_video_height <= 1:
-        return
-    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    frame = cv2.resize(frame, (current_video_width, current_video_height))
-    img = Image.fromarray(frame)
-    imgtk = ImageTk.PhotoImage(img)
-    video_label.imgtk = imgtk
-    video_label.config(image=imgtk)
+def show_frame(frame, force=False):
+    # force: results must be drawn even if a preview frame just went out
+    preview.render(frame, current_video_width, current_video_height, force)
+
+def refresh_overlay():
+    # Stage timings over the preview; recomputed twice a second, not per frame
+    preview.overlay = metrics.overlay_lines() if show_stats else None
+
+def poll_overlay():
+    refresh_overlay()
+    root.after(500, poll_overlay)
 
 def update_status(msg):
     status_text.config(state="normal")
@@ -190,95 +221,113 @@ def update_status(msg):
 
 # ================= LIVE VIDEO =================
 def update_video():
-    global last_frame
+    global last_frame, last_seq
     if not paused:
-        ret, frame = cap.read()
-        if ret:
-            last_frame = frame.copy()
+        seq, frame = grabber.latest()
+        if frame is not None and seq != last_seq:
+            last_seq = seq
+            last_frame = frame
+            if live:
+                frame = live_step(seq, frame)
             show_frame(frame)
-    root.after(30, update_video)
-
-# ================= OFFLINE DETECTION =================
-def offline_detect(frame):
-    detected_objects = []
-    detected_texts = []
-
-    original_frame = frame.copy()
-    yolo_frame = frame.copy()
-
-    results = yolo_model(yolo_frame, verbose=False)
-    for r in results:
-        for box in r.boxes:
-            cls = int(box.cls[0])
-            label = r.names[cls]
-            detected_objects.append(label)
-            x1,y1,x2,y2 = map(int, box.xyxy[0])
-            cv2.rectangle(yolo_frame,(x1,y1),(x2,y2),(0,255,0),2)
-            cv2.putText(yolo_frame,label,(x1,y1-6),
-                        cv2.FONT_HERSHEY_SIMPLEX,0.6,(0,255,0),2)
-
-    for bbox,text,conf in ocr_reader.readtext(original_frame):
-        if conf < 0.4: continue
-        detected_texts.append(text)
-        pts = np.array(bbox, np.int32)
-        cv2.polylines(yolo_frame,[pts],True,(255,0,0),2)
-        x,y = pts[0]
-        cv2.putText(yolo_frame,text[:15],(x,y-6),
-                    cv2.FONT_HERSHEY_SIMPLEX,0.5,(255,0,0),2)
-
-    return yolo_frame, detected_objects, detected_texts
-
-# ================= ONLINE DETECTION =================
-def online_detect(frame):
-    detected_objects = []
-    detected_texts = []
-
-    _, buf = cv2.imencode(".jpg", frame)
-    image = vision.Image(content=buf.tobytes())
-
-    objects = vision_client.object_localization(image=image).localized_object_annotations
-    ocr = vision_client.text_detection(image=image).text_annotations
-
-    h,w,_ = frame.shape
-
-    for o in objects:
-        v = o.bounding_poly.normalized_vertices
-        x1,y1,x2,y2 = int(v[0].x*w),int(v[0].y*h),int(v[2].x*w),int(v[2].y*h)
-        detected_objects.append(o.name)
-        cv2.rectangle(frame,(x1,y1),(x2,y2),(0,255,0),2)
-        cv2.putText(frame,o.name,(x1,y1-6),
-                    cv2.FONT_HERSHEY_SIMPLEX,0.6,(0,255,0),2)
-
-    for t in ocr[1:]:
-        pts = [[v.x,v.y] for v in t.bounding_poly.vertices if v.x is not None]
-        if len(pts) < 4: continue
-        label = t.description.strip()
-        detected_texts.append(label)
-        pts = np.array(pts,np.int32)
-        cv2.polylines(frame,[pts],True,(255,0,0),2)
-        x,y = pts[0]
-        cv2.putText(frame,label[:15],(x,y-6),
-                    cv2.FONT_HERSHEY_SIMPLEX,0.5,(255,0,0),2)
-
-    return frame, detected_objects, detected_texts
+            startup.mark("first frame")
+    root.after(15, update_video)
+
+# ================= LIVE DETECTION =================
+# YOLO runs on every Nth frame (N follows inference time) on its own
+# worker; in between, tracked boxes are extrapolated onto each new frame
+live_worker = DetectionWorker(root)
+live_scheduler = DetectionScheduler()
+live_tracker = IoUTracker()
+live_overlay = Overlay()
+
+def live_step(seq, frame):
+    if live_scheduler.due(seq, grabber.fps):
+        live_scheduler.start(seq)
+        live_worker.submit(live_detect, frame.copy(),
+                           on_result=lambda dets: on_live_result(dets, seq),
+                           on_error=on_live_error)
+    # Tracked boxes go on a reused layer, composited into a reused buffer
+    dets = live_tracker.detections(seq)
+    live_overlay.begin(frame.shape)
+    live_overlay.draw_boxes(dets.boxes, dets.labels())
+    return live_overlay.apply(frame)
+
+def live_detect(frame):
+    # Shares the model with CAPTURE; run_yolo() serializes the two
+    return run_yolo(frame)
+
+def on_live_result(dets, seq):
+    live_scheduler.finish()
+    if live:
+        live_tracker.update(dets, seq)
+
+def on_live_error(error):
+    live_scheduler.cancel()
+    print("Live detection error:", error)
 
 # ================= RUN DETECTION =================
+detection_worker = DetectionWorker(root)
+
+def detect(frame, mode, backend=None):
+    # Runs on the detection worker thread: no Tk calls in here
+    backend = backend or (connectivity.choose() if mode == "AUTO" else mode)
+
+    key = signature(frame)
+    cached = result_cache.get(key, backend)
+    if cached is not None:
+        return cached.draw(frame), cached, backend
+
+    start = time.perf_counter()
+    if backend == "ONLINE":
+        try:
+            # online_detect draws on its input, keep the capture for fallback
+            frame, result = online_detect(frame.copy())
+        except Exception as e:
+            connectivity.report_failure()
+            if mode != "AUTO":
+                raise
+            print("Vision failed, falling back to offline:", e)
+            return detect(frame, "OFFLINE")
+    else:
+        frame, result = offline_detect(frame)
+    result.latency = time.perf_counter() - start
+    connectivity.record(backend, result.latency)
+    metrics.observe(f"detect_{backend.lower()}", result.latency)
+
+    result_cache.put(key, backend, result)
+    return frame, result, backend
+
+def burst_detect(mode):
+    # Runs on the detection worker thread: the burst waits on the camera
+    frame = best_frame(grabber)
+    if frame is None:
+        raise RuntimeError("no camera frame")
+    # Keyed on the backend AUTO resolves to, and an offline fallback taken
+    # during a network blip isn't kept, so it can't be replayed once
+    # Vision is reachable again
+    backend = connectivity.choose() if mode == "AUTO" else mode
+    return scene_gate.run(frame, backend, detect, frame, mode, backend,
+                          keep=lambda done: done[2] == backend)
+
 def run_detection():
     global last_frame
     if last_frame is None:
         return
 
-    frame = last_frame.copy()
     update_status("Detecting...")
+    detection_worker.submit(burst_detect, MODE,
+                            on_result=on_detection_done,
+                            on_error=on_detection_error)
 
-    if MODE == "ONLINE" or (MODE == "AUTO" and internet_available()):
-        frame, objs, texts = online_detect(frame)
-        mode_label.config(text="MODE: ONLINE")
-    else:
-        frame, objs, texts = offline_detect(frame)
-        mode_label.config(text="MODE: OFFLINE")
+def on_detection_done(done):
+    frame, result, used_mode = done
+    objs, texts = result.objects, result.texts
+    if "first detection" not in startup.marks:
+        startup.mark("first detection")
+    mode_label.config(text=f"MODE: {used_mode}")
 
-    show_frame(frame)
+    show_frame(frame, force=True)
 
     message = "Objects: "
     message += ", ".join(objs) if objs else "None"
@@ -286,15 +335,33 @@ def run_detection():
     message += ", ".join(texts) if texts else "None"
 
     update_status(message)
-    speech_queue.put(message)
+    speech.say(message)
+
+def on_detection_error(error):
+    print("Detection error:", error)
+    update_status("Detection failed")
 
 # ================= EXIT =================
 def on_close():
+    detection_worker.shutdown()
+    live_worker.shutdown()
+    speech.stop()
+    connectivity.stop()
+    grabber.stop()
+    metrics.stop()
+    metrics.report(startup.report(), camera=grabber.stats(),
+                   cache=result_cache.stats(), scene_gate=scene_gate.stats())
+    result_cache.close()
     cap.release()
     root.destroy()
 
 root.protocol("WM_DELETE_WINDOW", on_close)
 
 # ================= START =================
+# Prometheus text endpoint, only when METRICS_PORT is set
+metrics.serve()
 update_video()
+poll_overlay()
+# Let the preview come up before competing with it for the CPU
+root.after(500, preload_models, MODE)
 root.mainloop()
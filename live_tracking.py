@@ -0,0 +1,145 @@
+import math
+import time
+
+import numpy as np
+
+from detector_backends import Detections, box_iou
+
+
+# ================= DETECTION SCHEDULER =================
+# Decides on which camera frames the detector runs in live mode. The gap
+# between runs follows the measured inference time, so on a slow CPU the
+# detector runs every few frames and on a fast one every frame.
+class DetectionScheduler:
+    def __init__(self, min_interval=1, max_interval=30, smoothing=0.7):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.smoothing = smoothing
+        self.infer_time = None
+        self.last_seq = -max_interval
+        self.started = None
+
+    def interval(self, fps):
+        if self.infer_time is None or fps <= 0:
+            return self.min_interval
+        frames = math.ceil(self.infer_time * fps)
+        return max(self.min_interval, min(self.max_interval, frames))
+
+    def due(self, seq, fps):
+        # Only one live detection in flight at a time
+        return self.started is None and seq - self.last_seq >= self.interval(fps)
+
+    def start(self, seq):
+        self.last_seq = seq
+        self.started = time.perf_counter()
+
+    def finish(self):
+        if self.started is None:
+            return
+        elapsed = time.perf_counter() - self.started
+        self.started = None
+        if self.infer_time is None:
+            self.infer_time = elapsed
+        else:
+            a = self.smoothing
+            self.infer_time = a * self.infer_time + (1 - a) * elapsed
+
+    def cancel(self):
+        self.started = None
+
+
+# ================= IOU TRACKER =================
+# Keeps boxes on screen between detector runs. Each detection is matched
+# to an existing track by class and IoU; a track remembers where it was
+# last detected (and on which frame) plus a per-frame velocity, so its box
+# can be extrapolated to any later frame without per-frame updates.
+class Track:
+    __slots__ = ("box", "seq", "velocity", "class_id", "score", "misses")
+
+    def __init__(self, box, seq, class_id, score):
+        self.box = box
+        self.seq = seq
+        self.velocity = np.zeros(4, np.float32)
+        self.class_id = class_id
+        self.score = score
+        self.misses = 0
+
+    def at(self, seq):
+        return self.box + self.velocity * (seq - self.seq)
+
+
+class IoUTracker:
+    def __init__(self, iou_threshold=0.3, max_misses=2, smoothing=0.5):
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+        self.smoothing = smoothing
+        self.tracks = []
+        self.names = {}
+
+    def update(self, dets, seq):
+        # dets were computed on camera frame `seq`
+        self.names = dets.names
+        predicted = np.array([t.at(seq) for t in self.tracks],
+                             np.float32).reshape(-1, 4)
+
+        matched_tracks = set()
+        matched_dets = set()
+        if len(self.tracks) and len(dets):
+            iou = box_iou(predicted, dets.boxes)
+            track_cls = np.array([t.class_id for t in self.tracks])
+            iou[track_cls[:, None] != dets.class_ids[None, :]] = 0
+
+            # Greedy: best pairs first
+            for flat in np.argsort(-iou, axis=None):
+                ti, di = map(int, np.unravel_index(flat, iou.shape))
+                if iou[ti, di] < self.iou_threshold:
+                    break
+                if ti in matched_tracks or di in matched_dets:
+                    continue
+                matched_tracks.add(ti)
+                matched_dets.add(di)
+                self._refresh(self.tracks[ti], dets, di, seq)
+
+        survivors = []
+        for i, t in enumerate(self.tracks):
+            if i not in matched_tracks:
+                t.misses += 1
+                if t.misses > self.max_misses:
+                    continue
+            survivors.append(t)
+
+        for i in range(len(dets)):
+            if i not in matched_dets:
+                survivors.append(Track(dets.boxes[i].copy(), seq,
+                                       int(dets.class_ids[i]),
+                                       float(dets.scores[i])))
+        self.tracks = survivors
+
+    def _refresh(self, track, dets, i, seq):
+        box = dets.boxes[i]
+        frames = seq - track.seq
+        if frames > 0:
+            v = (box - track.box) / frames
+            a = self.smoothing
+            track.velocity = a * track.velocity + (1 - a) * v
+        track.box = box.copy()
+        track.seq = seq
+        track.class_id = int(dets.class_ids[i])
+        track.score = float(dets.scores[i])
+        track.misses = 0
+
+    def detections(self, seq):
+        # Current tracks, extrapolated to frame `seq`, as Detections
+        if not self.tracks:
+            return Detections(np.zeros((0, 4), np.float32),
+                              np.zeros(0, np.float32),
+                              np.zeros(0, np.int32), self.names)
+        return Detections(
+            np.array([t.at(seq) for t in self.tracks], np.float32),
+            np.array([t.score for t in self.tracks], np.float32),
+            np.array([t.class_id for t in self.tracks], np.int32),
+            self.names,
+        )
+
+    def clear(self):
+        self.tracks = []
@@ -0,0 +1,181 @@
+import bisect
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+
+# ================= STAGE METRICS =================
+# Per-stage latency histograms for the capture -> detect -> speak pipeline,
+# so a slow capture can be pinned on the camera, JPEG encode, the Vision
+# round-trip, YOLO, EasyOCR or TTS:
+#
+#   with metrics.timer("yolo"):
+#       dets = detector(frame)
+#
+# Every stage keeps Prometheus-style cumulative buckets (for the /metrics
+# endpoint) and its most recent samples (for percentiles on the overlay).
+# Plain event counters (cache hits and the like) go through count().
+# Recording is a lock, a bisect and two appends, cheap enough for the
+# per-frame camera read.
+
+# Seconds; covers a 1 ms JPEG encode up to a 10 s OCR pass on a Pi
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+           1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS, recent=200):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)   # last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=recent)
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.recent.append(seconds)
+
+
+class Metrics:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.histograms = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+        self.server = None
+
+    # ---------- recording ----------
+    def observe(self, name, seconds):
+        with self.lock:
+            hist = self.histograms.get(name)
+            if hist is None:
+                hist = self.histograms[name] = Histogram(self.buckets)
+            hist.observe(seconds)
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    @contextmanager
+    def timer(self, name):
+        # Failed calls are recorded too: a timeout is exactly what we want
+        # to see here
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    # ---------- reading ----------
+    def summary(self):
+        # {stage: {"count", "last_ms", "p50_ms", "p95_ms"}} over recent samples
+        with self.lock:
+            recent = {name: (h.count, list(h.recent))
+                      for name, h in self.histograms.items()}
+        out = {}
+        for name, (count, samples) in sorted(recent.items()):
+            ms = np.array(samples) * 1000
+            out[name] = {
+                "count": count,
+                "last_ms": round(float(ms[-1]), 1),
+                "p50_ms": round(float(np.percentile(ms, 50)), 1),
+                "p95_ms": round(float(np.percentile(ms, 95)), 1),
+            }
+        return out
+
+    def overlay_lines(self):
+        lines = []
+        for name, s in self.summary().items():
+            lines.append(f"{name:<14} {s['last_ms']:7.1f} "
+                         f"p50 {s['p50_ms']:7.1f} p95 {s['p95_ms']:7.1f} ms")
+        with self.lock:
+            counters = sorted(self.counters.items())
+        for name, n in counters:
+            lines.append(f"{name:<14} {n:7d}")
+        return lines
+
+    def prometheus(self, prefix="vision_stage"):
+        # Prometheus text exposition format, one labelled histogram
+        with self.lock:
+            snapshot = [(name, list(h.counts), h.count, h.sum)
+                        for name, h in sorted(self.histograms.items())]
+            counters = sorted(self.counters.items())
+
+        metric = f"{prefix}_seconds"
+        lines = [f"# HELP {metric} Time spent in each pipeline stage.",
+                 f"# TYPE {metric} histogram"]
+        for name, counts, count, total in snapshot:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                lines.append(f'{metric}_bucket{{stage="{name}",le="{bound}"}} '
+                             f'{cumulative}')
+            lines.append(f'{metric}_bucket{{stage="{name}",le="+Inf"}} {count}')
+            lines.append(f'{metric}_sum{{stage="{name}"}} {total:.6f}')
+            lines.append(f'{metric}_count{{stage="{name}"}} {count}')
+
+        if counters:
+            lines += ["# HELP vision_events_total Pipeline events, e.g. cache hits.",
+                      "# TYPE vision_events_total counter"]
+            for name, n in counters:
+                lines.append(f'vision_events_total{{event="{name}"}} {n}')
+        return "\n".join(lines) + "\n"
+
+    def report(self, *blocks, **stats):
+        # Exit summary for the apps, printed only with VISION_STATS=1:
+        # free-form text blocks, then one line per stats dict, then timings
+        if os.environ.get("VISION_STATS") != "1":
+            return
+        for block in blocks:
+            print(block)
+        for name, values in stats.items():
+            print(f"{name}:", values)
+        print("\n".join(["Stage timing:"] + self.overlay_lines()))
+
+    # ---------- HTTP endpoint ----------
+    def serve(self, port=None, host="127.0.0.1"):
+        # Optional; port from METRICS_PORT, nothing is started without one
+        if port is None:
+            port = os.environ.get("METRICS_PORT")
+        if port in (None, "") or self.server is not None:
+            return self.server
+
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, fmt, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, int(port)), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name="metrics",
+                         daemon=True).start()
+        print(f"Metrics on http://{host}:{self.server.server_port}/metrics")
+        return self.server
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+metrics = Metrics()
@@ -0,0 +1,120 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+
+# ================= STARTUP TIMING =================
+# Records how long after launch each milestone (window up, first frame,
+# model ready, first detection) was reached. Import this module first so
+# the clock starts as early as possible.
+class StartupTimer:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.marks = {}
+        self.lock = threading.Lock()
+
+    def mark(self, name):
+        # Only the first occurrence of a milestone counts
+        with self.lock:
+            if name not in self.marks:
+                self.marks[name] = time.perf_counter() - self.start
+
+    def report(self):
+        with self.lock:
+            marks = sorted(self.marks.items(), key=lambda kv: kv[1])
+        lines = ["Startup timing:"]
+        for name, seconds in marks:
+            lines.append(f"  {name:<24} {seconds * 1000:8.0f} ms")
+        return "\n".join(lines)
+
+
+startup = StartupTimer()
+
+
+# ================= LAZY MODELS =================
+# A model is loaded (and warmed up with one dummy inference) the first
+# time it is needed, or ahead of time on a background thread with
+# preload(). get() blocks until loading is done, so callers never see a
+# half-initialised model.
+class LazyModel:
+    def __init__(self, name, loader, warmup=None):
+        self.name = name
+        self.loader = loader
+        self.warmup = warmup
+        self.model = None
+        self.lock = threading.Lock()
+
+    def get(self):
+        if self.model is not None:
+            return self.model
+        with self.lock:
+            if self.model is None:
+                model = self.loader()
+                startup.mark(f"{self.name} loaded")
+                if self.warmup is not None:
+                    self.warmup(model)
+                    startup.mark(f"{self.name} warm")
+                self.model = model
+        return self.model
+
+    def preload(self):
+        if self.model is not None:
+            return
+        threading.Thread(target=self._preload, name=f"load-{self.name}",
+                         daemon=True).start()
+
+    def _preload(self):
+        try:
+            self.get()
+        except Exception as e:
+            # The next get() retries and raises on the caller's thread
+            print(f"Failed to preload {self.name}:", e)
+
+    @property
+    def loaded(self):
+        return self.model is not None
+
+
+# ================= LOADERS =================
+# Offline mode runs YOLO and EasyOCR side by side on the same frame, so
+# each gets half the cores instead of both fighting over all of them
+MODEL_THREADS = max(1, (os.cpu_count() or 2) // 2)
+
+
+def pin_torch_threads(threads=MODEL_THREADS):
+    # torch's intra-op pool size is per process: YOLO and EasyOCR share it.
+    # Each calling thread gets its own team of this size.
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(threads)
+
+
+def load_yolo():
+    # Backend (PyTorch / ONNX Runtime) is chosen per device, see
+    # detector_backends.make_detector
+    from detector_backends import make_detector
+    pin_torch_threads()
+    return make_detector(threads=MODEL_THREADS)
+
+
+def warm_yolo(detector):
+    detector(np.zeros((480, 640, 3), np.uint8))
+
+
+def load_ocr():
+    import easyocr
+    pin_torch_threads()
+    return easyocr.Reader(['en'], gpu=False)
+
+
+def warm_ocr(reader):
+    reader.readtext(np.zeros((64, 256, 3), np.uint8))
+
+
+def load_vision():
+    from vision_batch import make_client
+    return make_client()
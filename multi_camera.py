@@ -0,0 +1,260 @@
+import argparse
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+from frame_grabber import FrameGrabber
+from frame_source import open_source
+from metrics import metrics
+
+
+# ================= SHARED INFERENCE SCHEDULER =================
+# Several cameras, one model. Each camera keeps its own FrameGrabber; a
+# single scheduler thread collects the newest frame from every camera,
+# picks up to `max_batch` of them fairly and runs them through the model
+# in one batch call:
+#
+#   - fairness: cameras are served round-robin, one frame each per round,
+#     starting after the camera that went first last time, so a fast
+#     camera can't crowd out a slow one
+#   - backpressure: each camera queues at most `queue_depth` frames and
+#     the oldest is dropped when a newer one arrives. Only one batch is in
+#     flight, so a second camera shares the model's throughput instead of
+#     doubling its load, and stale frames are skipped rather than piling up
+#
+# Results are handed back through a queue; drain() runs the callbacks on
+# the caller's thread (the Tk loop, via root.after).
+class CameraFeed:
+    def __init__(self, name, grabber, on_result, queue_depth):
+        self.name = name
+        self.grabber = grabber
+        self.on_result = on_result
+        self.pending = deque(maxlen=queue_depth)
+        self.last_seq = 0
+        self.queued = 0
+        self.dropped = 0
+        self.done = 0
+        self.failed = 0
+
+
+class InferenceScheduler:
+    def __init__(self, infer_batch, max_batch=4, queue_depth=1, poll=0.005):
+        # infer_batch(frames) -> one result per frame, in order. Frames of
+        # a batch that raises, or that get no result, count as failed
+        self.infer_batch = infer_batch
+        self.max_batch = max_batch
+        self.queue_depth = queue_depth
+        self.poll = poll
+
+        self.feeds = []
+        self.next_feed = 0
+        self.results = queue.Queue()
+        self.batches = 0
+        self.running = False
+        self.thread = None
+
+    def add_camera(self, name, grabber, on_result):
+        # on_result(name, seq, frame, result), called from drain()
+        self.feeds.append(CameraFeed(name, grabber, on_result, self.queue_depth))
+
+    # ---------- lifecycle ----------
+    def start(self):
+        if self.running:
+            return self
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="scheduler",
+                                       daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=2.0)
+            self.thread = None
+
+    # ---------- scheduling ----------
+    def _collect(self):
+        for feed in self.feeds:
+            seq, frame = feed.grabber.latest()
+            if frame is None or seq == feed.last_seq:
+                continue
+            feed.last_seq = seq
+            if len(feed.pending) == feed.pending.maxlen:
+                feed.dropped += 1
+            # Ring slots get rewritten, the queue needs its own copy
+            feed.pending.append((seq, frame.copy()))
+            feed.queued += 1
+
+    def _pick(self):
+        batch = []
+        n = len(self.feeds)
+        start = self.next_feed
+        while len(batch) < self.max_batch:
+            took = False
+            for i in range(n):
+                feed = self.feeds[(start + i) % n]
+                if feed.pending and len(batch) < self.max_batch:
+                    seq, frame = feed.pending.popleft()
+                    batch.append((feed, seq, frame))
+                    took = True
+            if not took:
+                break
+        self.next_feed = (start + 1) % n if n else 0
+        return batch
+
+    def _run(self):
+        while self.running:
+            self._collect()
+            batch = self._pick()
+            if not batch:
+                time.sleep(self.poll)
+                continue
+
+            frames = [frame for _, _, frame in batch]
+            try:
+                with metrics.timer("batch_infer"):
+                    outputs = list(self.infer_batch(frames))
+            except Exception as e:
+                print("Batch inference error:", e)
+                self._fail(batch)
+                continue
+            self.batches += 1
+            # Counters, not timings: mean batch = batch_frames / batches
+            metrics.count("batches")
+            metrics.count("batch_frames", len(batch))
+            for (feed, seq, frame), out in zip(batch, outputs):
+                feed.done += 1
+                self.results.put((feed, seq, frame, out))
+            if len(outputs) < len(batch):
+                print(f"Batch inference error: {len(outputs)} results for "
+                      f"{len(batch)} frames")
+                self._fail(batch[len(outputs):])
+
+    def _fail(self, batch):
+        for feed, _, _ in batch:
+            feed.failed += 1
+        metrics.count("batch_failed", len(batch))
+
+    def drain(self):
+        # Run pending callbacks on this thread
+        while True:
+            try:
+                feed, seq, frame, out = self.results.get_nowait()
+            except queue.Empty:
+                return
+            feed.on_result(feed.name, seq, frame, out)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "cameras": {f.name: {"queued": f.queued, "dropped": f.dropped,
+                                 "done": f.done, "failed": f.failed,
+                                 "fps": round(f.grabber.fps, 1)}
+                        for f in self.feeds},
+        }
+
+
+# ================= BATCH BACKENDS =================
+def yolo_batch():
+    # One detector for every camera, behind the shared YOLO lock
+    from detection import yolo_model, yolo_batch_call
+    yolo_model.get()
+    return yolo_batch_call
+
+
+def classify_batch():
+    # One classifier, run frame by frame on the scheduler thread
+    from batching import classify_batch as batch_of
+    from classification import make_classifier
+    return batch_of(make_classifier())
+
+
+# ================= APP =================
+def main():
+    parser = argparse.ArgumentParser(description="Several cameras, one model")
+    parser.add_argument("sources", nargs="*",
+                        default=os.environ.get("CAMERA_SOURCES", "0,1").split(","),
+                        help="camera indexes, video files or .mjpg recordings")
+    parser.add_argument("--model", choices=("yolo", "classify"), default="yolo")
+    parser.add_argument("--max-batch", type=int, default=4)
+    parser.add_argument("--queue-depth", type=int, default=1)
+    parser.add_argument("--headless", type=float, metavar="SECONDS",
+                        help="no window: run this long and print stats")
+    args = parser.parse_args()
+
+    caps = [open_source(s, width=640, height=480) for s in args.sources]
+    grabbers = [FrameGrabber(cap).start() for cap in caps]
+    infer = yolo_batch() if args.model == "yolo" else classify_batch()
+    scheduler = InferenceScheduler(infer, args.max_batch, args.queue_depth)
+
+    if args.headless:
+        for source, grabber in zip(args.sources, grabbers):
+            scheduler.add_camera(source, grabber, lambda *a: None)
+        scheduler.start()
+        end = time.monotonic() + args.headless
+        while time.monotonic() < end:
+            scheduler.drain()
+            time.sleep(0.05)
+        shutdown(scheduler, grabbers, caps)
+        return
+
+    import tkinter as tk
+    from preview_renderer import PreviewRenderer
+    from overlay import Overlay
+    from classification import categories
+
+    root = tk.Tk()
+    root.title("Vision Capture - cameras")
+    views = {}
+
+    for col, (source, grabber) in enumerate(zip(args.sources, grabbers)):
+        root.grid_columnconfigure(col, weight=1)
+        label = tk.Label(root, bg="black")
+        label.grid(row=0, column=col, sticky="nsew")
+        status = tk.Label(root, text=f"Camera {source}", font=("Arial", 14),
+                          fg="white", bg="black")
+        status.grid(row=1, column=col, sticky="ew")
+        views[source] = (PreviewRenderer(label, max_fps=15), status, Overlay())
+
+        def on_result(name, seq, frame, out):
+            preview, status, layer = views[name]
+            if args.model == "yolo":
+                layer.begin(frame.shape).draw_boxes(out.boxes, out.labels())
+                preview.render(layer.apply(frame), 480, 360, force=True)
+                names = out.labels()
+            else:
+                preview.render(frame, 480, 360, force=True)
+                names = [label for label, _, allowed in categories(out) if allowed]
+            status.config(text=f"Camera {name}: " + (", ".join(names) or "None"))
+
+        scheduler.add_camera(source, grabber, on_result)
+
+    def poll():
+        scheduler.drain()
+        root.after(15, poll)
+
+    def on_close():
+        shutdown(scheduler, grabbers, caps)
+        root.destroy()
+
+    root.protocol("WM_DELETE_WINDOW", on_close)
+    scheduler.start()
+    poll()
+    root.mainloop()
+
+
+def shutdown(scheduler, grabbers, caps):
+    scheduler.stop()
+    for grabber in grabbers:
+        grabber.stop()
+    for cap in caps:
+        cap.release()
+    print("Scheduler:", scheduler.stats())
+    print("\n".join(["Stage timing:"] + metrics.overlay_lines()))
+
+
+if __name__ == "__main__":
+    main()
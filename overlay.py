@@ -0,0 +1,108 @@
+import cv2
+import numpy as np
+
+
+# ================= ANNOTATION OVERLAY =================
+# Shared drawing code for every detector. Boxes arrive as whole arrays
+# (Detections from detector_backends, or Vision vertices pulled out once
+# below), are scaled and rounded in one NumPy step, and all outlines of a
+# kind go to OpenCV in a single polylines() call. Only the labels still
+# need one putText() each.
+#
+# Overlay is a reusable layer for the live preview: boxes are drawn onto a
+# persistent buffer and composited over each camera frame into a second
+# persistent buffer, so no per-frame copies are allocated.
+
+GREEN = (0, 255, 0)   # objects
+BLUE = (255, 0, 0)    # text
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+
+# ================= GOOGLE VISION =================
+def _vertices(polys):
+    # Vertices of many bounding polys as one (N, 4, 2) float32 array
+    return np.array([[(p.x, p.y) for p in poly[:4]] for poly in polys],
+                    np.float32).reshape(-1, 4, 2)
+
+
+def vision_objects(objects, width, height):
+    # (names, (N, 4) xyxy pixel boxes) from normalized_vertices
+    objects = [o for o in objects if len(o.bounding_poly.normalized_vertices) >= 4]
+    v = _vertices([o.bounding_poly.normalized_vertices for o in objects])
+    boxes = np.concatenate([v.min(axis=1), v.max(axis=1)], axis=1)
+    boxes *= np.array([width, height, width, height], np.float32)
+    return [o.name for o in objects], boxes
+
+
+def vision_texts(texts, scale=1.0):
+    # (labels, (N, 4, 2) int32 polygons) in original frame pixels; the
+    # first annotation is the full-text block and is skipped
+    texts = [t for t in texts[1:] if len(t.bounding_poly.vertices) >= 4]
+    polys = _vertices([t.bounding_poly.vertices for t in texts]) / scale
+    return ([t.description.strip() for t in texts],
+            np.rint(polys).astype(np.int32))
+
+
+# ================= DRAWING =================
+def _labels(img, anchors, labels, color, font_scale, max_chars):
+    # Labels sit just above the anchor, kept inside the top edge
+    anchors = anchors.copy()
+    anchors[:, 1] = np.maximum(anchors[:, 1] - 6, 15)
+    for (x, y), label in zip(anchors.tolist(), labels):
+        if label:
+            cv2.putText(img, label[:max_chars], (x, y), FONT, font_scale,
+                        color, 2)
+
+
+def draw_boxes(img, boxes, labels, color=GREEN, font_scale=0.6, max_chars=None):
+    # boxes: (N, 4) xyxy in img pixels
+    if len(boxes) == 0:
+        return img
+    b = np.rint(np.asarray(boxes, np.float32)).astype(np.int32)
+    corners = b[:, [0, 1, 2, 1, 2, 3, 0, 3]].reshape(-1, 4, 2)
+    cv2.polylines(img, list(corners), True, color, 2)
+    _labels(img, b[:, :2], labels, color, font_scale, max_chars)
+    return img
+
+
+def draw_polygons(img, polys, labels, color=BLUE, font_scale=0.5, max_chars=15):
+    # polys: (N, K, 2) int32 in img pixels, labelled at their first vertex
+    if len(polys) == 0:
+        return img
+    cv2.polylines(img, list(polys), True, color, 2)
+    _labels(img, polys[:, 0], labels, color, font_scale, max_chars)
+    return img
+
+
+# ================= REUSABLE LAYER =================
+class Overlay:
+    def __init__(self):
+        self.layer = None
+        self.mask = None
+        self.out = None
+
+    def begin(self, shape):
+        # Start a new set of annotations for frames of this shape
+        if self.layer is None or self.layer.shape != shape:
+            self.layer = np.zeros(shape, np.uint8)
+            self.mask = np.zeros(shape[:2], np.uint8)
+            self.out = np.empty(shape, np.uint8)
+        else:
+            self.layer.fill(0)
+        return self
+
+    def draw_boxes(self, boxes, labels, **kwargs):
+        draw_boxes(self.layer, boxes, labels, **kwargs)
+        return self
+
+    def draw_polygons(self, polys, labels, **kwargs):
+        draw_polygons(self.layer, polys, labels, **kwargs)
+        return self
+
+    def apply(self, frame):
+        # Returns frame with the layer on top, in a buffer reused on every
+        # call; frame itself is left untouched
+        cv2.cvtColor(self.layer, cv2.COLOR_BGR2GRAY, dst=self.mask)
+        np.copyto(self.out, frame)
+        cv2.copyTo(self.layer, self.mask, self.out)
+        return self.out
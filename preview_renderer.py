@@ -0,0 +1,85 @@
+import time
+
+import cv2
+import numpy as np
+from PIL import Image, ImageTk
+
+
+# ================= PREVIEW RENDERER =================
+# Draws camera frames into a Tk label without per-frame allocations.
+#
+# The old show_frame() built a new RGB array, a resized array, a PIL image
+# and a PhotoImage on every call. Here all of them are created once per
+# window size: frames are resized and colour-converted straight into a
+# preallocated RGBA buffer, the PIL image is a view onto that buffer (PIL
+# can only share memory for 4-byte pixels, hence RGBA rather than RGB),
+# and the single PhotoImage is updated in place with paste(). Frames
+# arriving faster than max_fps are skipped.
+#
+# Lines in `overlay` (e.g. stage timings) are drawn into the buffer after
+# conversion, so the caller's frame is never touched.
+class PreviewRenderer:
+    def __init__(self, label, max_fps=30):
+        self.label = label
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+        self.size = None
+        self.scaled = None
+        self.rgba = None
+        self.image = None
+        self.photo = None
+        self.overlay = None
+        self.last_time = 0.0
+        self.rendered = 0
+        self.skipped = 0
+
+    def _allocate(self, width, height):
+        self.size = (width, height)
+        self.scaled = np.empty((height, width, 3), np.uint8)
+        self.rgba = np.empty((height, width, 4), np.uint8)
+        # Shares memory with self.rgba, nothing is copied when it changes
+        self.image = Image.frombuffer("RGBA", (width, height), self.rgba,
+                                      "raw", "RGBA", 0, 1)
+        self.photo = ImageTk.PhotoImage(self.image)
+        self.label.imgtk = self.photo
+        self.label.config(image=self.photo)
+
+    def render(self, frame, width, height, force=False):
+        # Returns True if the frame was drawn, False if skipped
+        if width <= 1 or height <= 1:
+            return False
+
+        now = time.perf_counter()
+        if not force and now - self.last_time < self.min_interval:
+            self.skipped += 1
+            return False
+        self.last_time = now
+
+        if self.size != (width, height):
+            self._allocate(width, height)
+
+        h, w = frame.shape[:2]
+        if (w, h) == (width, height):
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGBA, dst=self.rgba)
+        else:
+            cv2.resize(frame, (width, height), dst=self.scaled)
+            cv2.cvtColor(self.scaled, cv2.COLOR_BGR2RGBA, dst=self.rgba)
+
+        if self.overlay:
+            self._draw_overlay(self.overlay)
+
+        self.photo.paste(self.image)
+        self.rendered += 1
+        return True
+
+    def _draw_overlay(self, lines):
+        font = cv2.FONT_HERSHEY_PLAIN
+        line_h = 16
+        width = max(cv2.getTextSize(line, font, 1, 1)[0][0] for line in lines)
+        cv2.rectangle(self.rgba, (0, 0), (width + 12, len(lines) * line_h + 8),
+                      (0, 0, 0, 255), -1)
+        for i, line in enumerate(lines):
+            cv2.putText(self.rgba, line, (6, (i + 1) * line_h), font, 1,
+                        (255, 255, 0, 255), 1, cv2.LINE_AA)
+
+    def stats(self):
+        return {"rendered": self.rendered, "skipped": self.skipped}
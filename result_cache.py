@@ -0,0 +1,223 @@
+import sqlite3
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from results import DetectionResult
+
+
+# ================= PERCEPTUAL HASH =================
+def dhash(frame, size=8):
+    # 64-bit difference hash: robust to small shifts, noise and exposure
+    if frame.ndim == 3:
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(frame, (size + 1, size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+# ================= THUMBNAIL CHECK =================
+# A 64-bit hash can't tell two flash cards apart: "CAT" and "DOG", or "3"
+# and "8", hash 0-2 bits apart. A small grayscale thumbnail can, so a hash
+# match only counts when at most `max_changed` thumbnail pixels differ by
+# more than `pixel_diff` grey levels. Sensor noise and exposure drift stay
+# well under that; a different word or letter changes dozens of pixels.
+THUMB_SIZE = (64, 48)
+
+
+def thumbnail(frame, size=THUMB_SIZE):
+    if frame.ndim == 3:
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+
+def changed_pixels(a, b, pixel_diff=25):
+    return cv2.countNonZero(
+        cv2.threshold(cv2.absdiff(a, b), pixel_diff, 255,
+                      cv2.THRESH_BINARY)[1])
+
+
+def signature(frame):
+    # Cache key for a frame: (dhash, thumbnail)
+    if frame.ndim == 3:
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return dhash(frame), thumbnail(frame)
+
+
+def _to_signed(h):
+    # SQLite INTEGER is signed 64-bit
+    return h - (1 << 64) if h >= (1 << 63) else h
+
+
+def _to_unsigned(h):
+    return h + (1 << 64) if h < 0 else h
+
+
+# ================= RESULT CACHE =================
+# On-disk cache of detection results keyed by signature(frame). A lookup
+# matches a stored frame within `max_distance` hash bits whose thumbnail
+# also passes the pixel check above, so re-pointing the camera at the same
+# flash card is a hit even though no two captures are byte-identical, and
+# a different card with a near-identical hash is not.
+#
+# Entries are namespaced by backend ("ONLINE" / "OFFLINE") and evicted by
+# TTL first, then least-recently-used until under the entry and byte caps.
+# Each entry stores only the DetectionResult in its binary form; a hit is
+# drawn onto the current frame by the caller, never an old capture.
+SCHEMA_VERSION = 3
+
+
+class ResultCache:
+    def __init__(self, path="detection_cache.db", max_distance=6,
+                 pixel_diff=25, max_changed=2,
+                 ttl=7 * 24 * 3600, max_entries=500, max_bytes=64 << 20):
+        self.max_distance = max_distance
+        self.pixel_diff = pixel_diff
+        self.max_changed = max_changed
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        # Older layouts stored annotated images or no thumbnail; start
+        # those over
+        version = self.db.execute("PRAGMA user_version").fetchone()[0]
+        if version < SCHEMA_VERSION:
+            self.db.execute("DROP TABLE IF EXISTS entries")
+            self.db.execute("DROP TABLE IF EXISTS results")
+            self.db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                id        INTEGER PRIMARY KEY,
+                backend   TEXT NOT NULL,
+                hash      INTEGER NOT NULL,
+                thumb     BLOB NOT NULL,
+                created   REAL NOT NULL,
+                last_used REAL NOT NULL,
+                result    BLOB NOT NULL
+            )
+        """)
+        self.db.execute(
+            "CREATE INDEX IF NOT EXISTS results_lru ON results (last_used)")
+        self.db.commit()
+
+        # Hashes and thumbnails (3 KB each) are checked on every lookup,
+        # keep them in memory
+        self.index = {}
+        for row_id, backend, h, thumb, created in self.db.execute(
+                "SELECT id, backend, hash, thumb, created FROM results"):
+            thumb = np.frombuffer(thumb, np.uint8).reshape(THUMB_SIZE[::-1])
+            self.index[row_id] = (backend, _to_unsigned(h), thumb, created)
+
+        self.hits = 0
+        self.misses = 0
+
+    # ---------- lookup ----------
+    def _nearest(self, backend, key, now):
+        # Closest unexpired entry within max_distance whose thumbnail
+        # matches, or None
+        h, thumb = key
+        oldest = now - self.ttl if self.ttl else -1.0
+        candidates = []
+        for row_id, (b, other, other_thumb, created) in self.index.items():
+            if b != backend or created < oldest:
+                continue
+            d = hamming(h, other)
+            if d <= self.max_distance:
+                candidates.append((d, row_id, other_thumb))
+        for _, row_id, other_thumb in sorted(candidates, key=lambda c: c[:2]):
+            if (changed_pixels(thumb, other_thumb, self.pixel_diff)
+                    <= self.max_changed):
+                return row_id
+        return None
+
+    def get(self, key, backend):
+        # key is signature(frame) of the input frame. Returns the
+        # DetectionResult or None; draw it on the current frame with
+        # result.draw(frame)
+        now = time.time()
+        with self.lock:
+            row_id = self._nearest(backend, key, now)
+            row = None
+            if row_id is not None:
+                row = self.db.execute(
+                    "SELECT result FROM results WHERE id = ?",
+                    (row_id,)).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.db.execute("UPDATE results SET last_used = ? WHERE id = ?",
+                            (now, row_id))
+            self.db.commit()
+            self.hits += 1
+
+        return DetectionResult.from_bytes(row[0])
+
+    # ---------- store ----------
+    def put(self, key, backend, result):
+        h, thumb = key
+        blob = result.to_bytes()
+        now = time.time()
+
+        with self.lock:
+            # Replace a near-duplicate rather than storing the scene twice
+            old_id = self._nearest(backend, key, now)
+            if old_id is not None:
+                self.db.execute("DELETE FROM results WHERE id = ?", (old_id,))
+                del self.index[old_id]
+
+            cur = self.db.execute(
+                "INSERT INTO results "
+                "(backend, hash, thumb, created, last_used, result) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (backend, _to_signed(h), thumb.tobytes(), now, now, blob))
+            self.index[cur.lastrowid] = (backend, h, thumb.copy(), now)
+            self._evict(now)
+            self.db.commit()
+
+    def _evict(self, now):
+        if self.ttl:
+            expired = [r[0] for r in self.db.execute(
+                "SELECT id FROM results WHERE created < ?", (now - self.ttl,))]
+            self._delete(expired)
+
+        count, size = self.db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(result)), 0) "
+            "FROM results").fetchone()
+        if count <= self.max_entries and size <= self.max_bytes:
+            return
+
+        victims = []
+        for row_id, nbytes in self.db.execute(
+                "SELECT id, LENGTH(result) FROM results "
+                "ORDER BY last_used ASC"):
+            if count <= self.max_entries and size <= self.max_bytes:
+                break
+            victims.append(row_id)
+            count -= 1
+            size -= nbytes
+        self._delete(victims)
+
+    def _delete(self, ids):
+        for row_id in ids:
+            self.db.execute("DELETE FROM results WHERE id = ?", (row_id,))
+            self.index.pop(row_id, None)
+
+    # ---------- misc ----------
+    def stats(self):
+        with self.lock:
+            entries = len(self.index)
+        return {"entries": entries, "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        with self.lock:
+            self.db.close()
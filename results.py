@@ -0,0 +1,221 @@
+import json
+import struct
+
+import numpy as np
+
+import overlay
+
+
+# ================= DETECTION RESULTS =================
+# One result type for every detector: YOLO boxes, EasyOCR and Vision text,
+# Vision objects and MediaPipe categories. Boxes and scores are kept rather
+# than thrown away after drawing, so a result can be cached, logged,
+# redrawn or compared without running the model again.
+#
+# A DetectionResult is backed by one NumPy structured array (kind, score,
+# four corner points per detection) plus the list of label strings.
+# Iterating it yields Detection views. It serializes to a dict / JSON line
+# for logs, or to a compact binary blob (header + raw records) for storage.
+
+OBJECT, TEXT, CATEGORY = 0, 1, 2
+KINDS = ("object", "text", "category")
+
+RECORD = np.dtype([
+    ("kind", "u1"),
+    ("score", "<f4"),
+    ("points", "<f4", (4, 2)),   # corners in frame pixels, NaN for categories
+])
+
+MAGIC = b"DRS1"
+
+
+class Detection:
+    __slots__ = ("kind", "label", "score", "points")
+
+    def __init__(self, kind, label, score, points=None):
+        self.kind = kind
+        self.label = label
+        self.score = score
+        self.points = points
+
+    @property
+    def box(self):
+        # (x1, y1, x2, y2) around the points, None for categories
+        if self.points is None:
+            return None
+        return (*self.points.min(axis=0).tolist(), *self.points.max(axis=0).tolist())
+
+    def __repr__(self):
+        return f"Detection({KINDS[self.kind]}, {self.label!r}, {self.score:.2f})"
+
+
+def _records(kind, scores, points):
+    records = np.zeros(len(scores), RECORD)
+    records["kind"] = kind
+    records["score"] = scores
+    records["points"] = points
+    return records
+
+
+def _corners(boxes):
+    # (N, 4) xyxy -> (N, 4, 2) clockwise corners
+    boxes = np.asarray(boxes, np.float32).reshape(-1, 4)
+    return boxes[:, [0, 1, 2, 1, 2, 3, 0, 3]].reshape(-1, 4, 2)
+
+
+class DetectionResult:
+    __slots__ = ("backend", "size", "records", "labels", "latency")
+
+    def __init__(self, backend, size, records=None, labels=None, latency=None):
+        self.backend = backend
+        self.size = tuple(size)          # (width, height) of the input frame
+        self.records = np.zeros(0, RECORD) if records is None else records
+        self.labels = [] if labels is None else list(labels)
+        self.latency = latency           # seconds, when measured
+
+    # ---------- builders ----------
+    @classmethod
+    def from_yolo(cls, dets, size, backend="yolo"):
+        # dets: detector_backends.Detections
+        return cls(backend, size,
+                   _records(OBJECT, dets.scores, _corners(dets.boxes)),
+                   dets.labels())
+
+    @classmethod
+    def from_ocr(cls, results, size, min_conf=0.4, backend="easyocr"):
+        # results: readtext-style (bbox, text, conf) tuples
+        results = [r for r in results if r[2] >= min_conf]
+        points = np.array([r[0] for r in results], np.float32).reshape(-1, 4, 2)
+        return cls(backend, size,
+                   _records(TEXT, [r[2] for r in results], points),
+                   [r[1] for r in results])
+
+    @classmethod
+    def from_vision(cls, res, size, backend="vision"):
+        # res: vision_batch.VisionResult. Vision gives no per-word text
+        # confidence, those are stored as 1.0
+        w, h = size
+        names, boxes = overlay.vision_objects(res.objects, w, h)
+        scores = [o.score for o in res.objects
+                  if len(o.bounding_poly.normalized_vertices) >= 4]
+        texts, polys = overlay.vision_texts(res.texts, res.scale)
+        return cls(backend, size, np.concatenate([
+            _records(OBJECT, scores, _corners(boxes)),
+            _records(TEXT, np.ones(len(texts), np.float32), polys),
+        ]), names + texts)
+
+    @classmethod
+    def from_categories(cls, found, size, backend="mediapipe"):
+        # found: classification.categories() output
+        return cls(backend, size,
+                   _records(CATEGORY, [score for _, score, _ in found], np.nan),
+                   [label for label, _, _ in found])
+
+    @classmethod
+    def merge(cls, backend, results):
+        # Combine the results of several detectors run on the same frame
+        results = list(results)
+        labels = [label for r in results for label in r.labels]
+        return cls(backend, results[0].size,
+                   np.concatenate([r.records for r in results]), labels)
+
+    # ---------- access ----------
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        for rec, label in zip(self.records, self.labels):
+            kind = int(rec["kind"])
+            points = None if kind == CATEGORY else rec["points"]
+            yield Detection(kind, label, float(rec["score"]), points)
+
+    def _labels(self, kind):
+        return [label for label, k in zip(self.labels, self.records["kind"])
+                if k == kind and label]
+
+    @property
+    def objects(self):
+        return self._labels(OBJECT)
+
+    @property
+    def texts(self):
+        return self._labels(TEXT)
+
+    @property
+    def categories(self):
+        return self._labels(CATEGORY)
+
+    def draw(self, frame):
+        # Objects as green boxes, text as blue polygons
+        kinds = self.records["kind"]
+        points = self.records["points"]
+        labels = np.array(self.labels, object)
+
+        objects = kinds == OBJECT
+        boxes = np.concatenate([points[objects].min(axis=1),
+                                points[objects].max(axis=1)], axis=1)
+        overlay.draw_boxes(frame, boxes, labels[objects].tolist())
+
+        texts = kinds == TEXT
+        polys = np.rint(points[texts]).astype(np.int32)
+        overlay.draw_polygons(frame, polys, labels[texts].tolist())
+        return frame
+
+    # ---------- JSON ----------
+    def to_dict(self):
+        detections = []
+        for d in self:
+            item = {"kind": KINDS[d.kind], "label": d.label,
+                    "score": round(d.score, 4)}
+            if d.kind == OBJECT:
+                item["box"] = [round(v, 1) for v in d.box]
+            elif d.kind == TEXT:
+                item["points"] = np.round(d.points, 1).tolist()
+            detections.append(item)
+        out = {"backend": self.backend, "size": list(self.size),
+               "detections": detections}
+        if self.latency is not None:
+            out["ms"] = round(self.latency * 1000, 1)
+        return out
+
+    @classmethod
+    def from_dict(cls, data):
+        items = data["detections"]
+        records = np.zeros(len(items), RECORD)
+        for rec, item in zip(records, items):
+            kind = KINDS.index(item["kind"])
+            rec["kind"] = kind
+            rec["score"] = item["score"]
+            if kind == OBJECT:
+                rec["points"] = _corners(item["box"])[0]
+            elif kind == TEXT:
+                rec["points"] = item["points"]
+            else:
+                rec["points"] = np.nan
+        latency = data["ms"] / 1000 if "ms" in data else None
+        return cls(data["backend"], data["size"], records,
+                   [item["label"] for item in items], latency)
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, line):
+        return cls.from_dict(json.loads(line))
+
+    # ---------- binary ----------
+    def to_bytes(self):
+        # MAGIC, header length, JSON header (labels and metadata), records
+        header = json.dumps([self.backend, self.size, self.latency, self.labels],
+                            separators=(",", ":")).encode()
+        return (MAGIC + struct.pack("<I", len(header)) + header
+                + self.records.tobytes())
+
+    @classmethod
+    def from_bytes(cls, blob):
+        if blob[:4] != MAGIC:
+            raise ValueError("not a serialized DetectionResult")
+        (n,) = struct.unpack_from("<I", blob, 4)
+        backend, size, latency, labels = json.loads(blob[8:8 + n])
+        records = np.frombuffer(blob, RECORD, offset=8 + n).copy()
+        return cls(backend, size, records, labels, latency)
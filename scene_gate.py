@@ -0,0 +1,89 @@
+import threading
+import time
+
+import cv2
+
+from metrics import metrics
+from result_cache import changed_pixels, dhash, hamming, thumbnail
+
+
+# ================= SCENE-CHANGE GATE =================
+# Sits in front of a detection call and hands back the previous result
+# while the camera is still looking at the same scene, so pressing CAPTURE
+# again on an unchanged flash card doesn't re-run YOLO, EasyOCR or Vision:
+#
+#   done = scene_gate.run(frame, backend, detect, frame, mode, backend)
+#
+# A frame counts as unchanged when both checks pass against the frame the
+# stored result came from:
+#   - its dhash is within `max_distance` bits (layout hasn't changed)
+#   - at most `max_changed` pixels of a 64x48 grayscale thumbnail differ by
+#     more than `pixel_diff` grey levels (the same check ResultCache uses;
+#     a new word on the card, which the 64-bit hash can miss, fails it)
+# Results are also keyed (by mode / backend) and expire after `max_age`
+# seconds. Unlike ResultCache this holds a single entry in memory and
+# needs no SQLite read or JPEG decode on a hit.
+class SceneGate:
+    def __init__(self, max_distance=4, pixel_diff=25, max_changed=2,
+                 max_age=60.0, thumb_size=(64, 48), name="scene_gate"):
+        self.max_distance = max_distance
+        self.pixel_diff = pixel_diff
+        self.max_changed = max_changed
+        self.max_age = max_age
+        self.thumb_size = thumb_size
+        self.name = name
+
+        self.lock = threading.Lock()
+        self.last = None     # (key, hash, thumb, time, value)
+        self.hits = 0
+        self.misses = 0
+
+    def _signature(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        return dhash(gray), thumbnail(gray, self.thumb_size)
+
+    def _changed(self, a, b):
+        return changed_pixels(a, b, self.pixel_diff)
+
+    def _lookup(self, key, h, thumb):
+        with self.lock:
+            last = self.last
+        if last is None:
+            return None
+        last_key, last_h, last_thumb, stored, value = last
+        if (last_key != key
+                or time.monotonic() - stored > self.max_age
+                or hamming(h, last_h) > self.max_distance
+                or self._changed(thumb, last_thumb) > self.max_changed):
+            return None
+        return value
+
+    def run(self, frame, key, fn, *args, keep=None):
+        # Returns fn(*args), or the stored value if the scene hasn't changed.
+        # Failed calls are not stored, nor are values `keep` rejects.
+        h, thumb = self._signature(frame)
+        value = self._lookup(key, h, thumb)
+        if value is not None:
+            with self.lock:
+                self.hits += 1
+            metrics.count(f"{self.name}_hit")
+            return value
+
+        with self.lock:
+            self.misses += 1
+        metrics.count(f"{self.name}_miss")
+        value = fn(*args)
+        if keep is None or keep(value):
+            with self.lock:
+                self.last = (key, h, thumb, time.monotonic(), value)
+        return value
+
+    def reset(self):
+        with self.lock:
+            self.last = None
+
+    def stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses,
+                    "hit_rate": round(self.hits / total, 3) if total else 0.0}
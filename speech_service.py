@@ -0,0 +1,168 @@
+import hashlib
+import os
+import shutil
+import subprocess
+import threading
+import time
+
+import pyttsx3
+
+from metrics import metrics
+
+
+# ================= SPEECH SERVICE =================
+# One long-lived thread owns the only pyttsx3 engine. say() never blocks:
+#
+#   - a new message interrupts whatever is being spoken,
+#   - messages queued while busy are coalesced, only the newest is spoken,
+#   - every message is rendered to a WAV file once and replayed from the
+#     cache afterwards, so repeated results ("Objects: None", "APPLE")
+#     skip synthesis entirely.
+#
+# Playback goes through a command-line player so it can be cut off
+# mid-sentence. Without one, the engine speaks directly (still coalesced,
+# but not interruptible).
+PLAYERS = (["aplay", "-q"], ["paplay"], ["afplay"])
+
+
+def find_player():
+    for cmd in PLAYERS:
+        if shutil.which(cmd[0]):
+            return cmd
+    return None
+
+
+class SpeechService:
+    def __init__(self, rate_delta=0, cache_dir="tts_cache", max_cached=200,
+                 player="auto"):
+        self.rate_delta = rate_delta
+        self.cache_dir = cache_dir
+        self.max_cached = max_cached
+        self.player = find_player() if player == "auto" else player
+
+        self.cond = threading.Condition()
+        self.pending = None
+        self.warm = []
+        self.interrupt = threading.Event()
+        self.running = False
+        self.thread = None
+        self.engine = None
+        self.proc = None
+
+    # ---------- lifecycle ----------
+    def start(self):
+        if self.running:
+            return self
+        if self.player:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="speech",
+                                       daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.pending = None
+            self.interrupt.set()
+            self.cond.notify()
+
+    # ---------- public ----------
+    def say(self, text):
+        with self.cond:
+            self.pending = text
+            self.interrupt.set()
+            self.cond.notify()
+
+    def busy(self):
+        proc = self.proc
+        return self.pending is not None or (proc is not None and proc.poll() is None)
+
+    # ---------- worker ----------
+    def _run(self):
+        # pyttsx3 engines must be used from the thread that created them
+        self.engine = pyttsx3.init()
+        rate = self.engine.getProperty('rate')
+        self.engine.setProperty('rate', rate + self.rate_delta)
+
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: self.pending is not None or self.warm
+                                   or not self.running)
+                if not self.running:
+                    break
+                if self.pending is None:
+                    # Idle: render one prerender() phrase, then check again
+                    phrase = self.warm.pop(0)
+                    text = None
+                else:
+                    text = self.pending
+                    self.pending = None
+                    self.interrupt.clear()
+
+            try:
+                if text is None:
+                    self._render(phrase)
+                else:
+                    self._speak(text)
+            except Exception as e:
+                print("Speech error:", e)
+
+        self.engine.stop()
+
+    def _speak(self, text):
+        if not self.player:
+            with metrics.timer("tts_speak"):
+                self.engine.say(text)
+                self.engine.runAndWait()
+            return
+
+        path = self._render(text)
+        if self.interrupt.is_set():
+            return
+
+        start = time.perf_counter()
+        self.proc = subprocess.Popen(self.player + [path],
+                                     stdout=subprocess.DEVNULL,
+                                     stderr=subprocess.DEVNULL)
+        while self.proc.poll() is None:
+            if self.interrupt.wait(0.05):
+                self.proc.terminate()
+                self.proc.wait()
+                break
+        self.proc = None
+        metrics.observe("tts_play", time.perf_counter() - start)
+
+    # ---------- phrase cache ----------
+    def _render(self, text):
+        key = hashlib.sha1(f"{self.rate_delta}|{text}".encode()).hexdigest()[:16]
+        path = os.path.join(self.cache_dir, key + ".wav")
+        if os.path.exists(path):
+            os.utime(path)   # LRU order
+            return path
+
+        tmp = path + ".tmp.wav"
+        with metrics.timer("tts_synth"):
+            self.engine.save_to_file(text, tmp)
+            self.engine.runAndWait()
+        os.replace(tmp, path)
+        self._evict()
+        return path
+
+    def _evict(self):
+        files = [os.path.join(self.cache_dir, f) for f in os.listdir(self.cache_dir)
+                 if f.endswith(".wav") and not f.endswith(".tmp.wav")]
+        if len(files) <= self.max_cached:
+            return
+        files.sort(key=os.path.getmtime)
+        for f in files[:len(files) - self.max_cached]:
+            os.remove(f)
+
+    def prerender(self, phrases):
+        # Warm the cache in idle time for phrases we know will come up
+        if not self.player:
+            return
+        with self.cond:
+            self.warm.extend(phrases)
+            self.cond.notify()
@@ -0,0 +1,28 @@
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+# The modules live at the repository root, not in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _card(text, seed=0, scale=None):
+    # A blurred, noisy 640x480 flash card with dark text on white
+    rng = np.random.RandomState(seed)
+    img = np.full((480, 640, 3), 235, np.uint8)
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    scale = scale or (8 if len(text) <= 2 else 5)
+    (w, h), _ = cv2.getTextSize(text, font, scale, 14)
+    cv2.putText(img, text, ((640 - w) // 2, (480 + h) // 2), font, scale,
+                (20, 20, 20), 14, cv2.LINE_AA)
+    img = cv2.GaussianBlur(img, (5, 5), 1.2)
+    noise = rng.randint(-8, 9, img.shape)
+    return np.clip(img.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+
+@pytest.fixture
+def card():
+    return _card
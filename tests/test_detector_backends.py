@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from detector_backends import (Detections, OnnxDetector, compare, load_names,
+                               make_detector, write_names)
+
+
+def decoder(names=None):
+    # An OnnxDetector without a session, enough to exercise _decode()
+    det = OnnxDetector.__new__(OnnxDetector)
+    det.imgsz, det.conf, det.iou = 640, 0.25, 0.7
+    det.names = names or {}
+    return det
+
+
+def raw_output(rows, classes=80):
+    # rows: (cx, cy, w, h, class_id, score) in letterboxed pixels
+    out = np.zeros((4 + classes, len(rows)), np.float32)
+    for i, (cx, cy, w, h, c, s) in enumerate(rows):
+        out[:4, i] = cx, cy, w, h
+        out[4 + c, i] = s
+    return out
+
+
+def test_decode_undoes_letterbox_and_suppresses_duplicates():
+    # 640x480 frame: scale 1, 80 px bars above and below
+    out = raw_output([(320, 320, 100, 50, 5, 0.9),
+                      (322, 321, 100, 50, 5, 0.8),
+                      (100, 100, 20, 20, 7, 0.1)])
+    dets = decoder()._decode(out, (480, 640, 3), 1.0, 0, 80)
+    assert len(dets) == 1
+    np.testing.assert_allclose(dets.boxes[0], [270, 215, 370, 265])
+    assert dets.scores[0] == pytest.approx(0.9)
+
+
+def test_labels_fall_back_to_class_index():
+    out = raw_output([(320, 320, 100, 50, 5, 0.9)])
+    dets = decoder()._decode(out, (480, 640, 3), 1.0, 0, 80)
+    assert dets.labels() == ["5"]
+    dets.names = {5: "bus"}
+    assert dets.labels() == ["bus"]
+
+
+def test_names_sidecar_round_trip(tmp_path):
+    model = str(tmp_path / "model-int8.onnx")
+    write_names(model, {0: "person", 1: "bicycle"})
+    assert load_names(model, {}) == {0: "person", 1: "bicycle"}
+    assert load_names(model, {"names": "{0: 'cat'}"}) == {0: "cat"}
+    assert load_names(str(tmp_path / "other.onnx")) == {}
+
+
+def test_compare_identical_detections():
+    dets = Detections(np.array([[0, 0, 10, 10], [20, 20, 40, 40]], np.float32),
+                      np.array([0.9, 0.5], np.float32),
+                      np.array([1, 2], np.int32), {})
+    c = compare(dets, dets)
+    assert c["matched"] == 2
+    assert c["max_box_px"] == 0.0 and c["max_score"] == 0.0
+
+
+@pytest.mark.parametrize("backend", ["onnx"])
+def test_onnx_matches_torch(backend):
+    # Full parity against the PyTorch reference on the ultralytics sample
+    pytest.importorskip("ultralytics")
+    pytest.importorskip("onnxruntime")
+    import cv2
+    from ultralytics.utils import ASSETS
+
+    frame = cv2.imread(str(ASSETS / "bus.jpg"))
+    ref = make_detector("torch")(frame)
+    other = make_detector(backend)(frame)
+
+    c = compare(ref, other)
+    assert c["matched"] == c["reference"] > 0
+    assert c["max_box_px"] < 2.0
+    assert c["max_score"] < 0.02
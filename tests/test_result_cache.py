@@ -0,0 +1,49 @@
+import pytest
+
+from result_cache import ResultCache, dhash, hamming, signature
+from results import DetectionResult
+
+
+def ocr_result(text):
+    box = [[100, 100], [500, 100], [500, 300], [100, 300]]
+    return DetectionResult.from_ocr([(box, text, 0.9)], (640, 480))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache.db"))
+    yield cache
+    cache.close()
+
+
+def test_same_card_is_a_hit(cache, card):
+    cache.put(signature(card("CAT", 1)), "OFFLINE", ocr_result("CAT"))
+    hit = cache.get(signature(card("CAT", 2)), "OFFLINE")
+    assert hit is not None and hit.texts == ["CAT"]
+    assert cache.get(signature(card("CAT", 2)), "ONLINE") is None
+
+
+@pytest.mark.parametrize("a, b", [("CAT", "DOG"), ("A", "B"), ("3", "8"),
+                                  ("E", "F")])
+def test_different_cards_do_not_share_a_result(cache, card, a, b):
+    # These hash within max_distance of each other; the thumbnail tells
+    # them apart
+    assert hamming(dhash(card(a, 1)), dhash(card(b, 2))) <= cache.max_distance
+    cache.put(signature(card(a, 1)), "OFFLINE", ocr_result(a))
+    assert cache.get(signature(card(b, 2)), "OFFLINE") is None
+
+    cache.put(signature(card(b, 2)), "OFFLINE", ocr_result(b))
+    assert cache.get(signature(card(a, 3)), "OFFLINE").texts == [a]
+    assert cache.get(signature(card(b, 3)), "OFFLINE").texts == [b]
+
+
+def test_thumbnails_survive_reopening(tmp_path, card):
+    path = str(tmp_path / "cache.db")
+    cache = ResultCache(path)
+    cache.put(signature(card("7", 1)), "OFFLINE", ocr_result("7"))
+    cache.close()
+
+    cache = ResultCache(path)
+    assert cache.get(signature(card("7", 2)), "OFFLINE").texts == ["7"]
+    assert cache.get(signature(card("1", 2)), "OFFLINE") is None
+    cache.close()
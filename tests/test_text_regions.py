@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from text_regions import read_text, text_candidates
+
+
+class RecordingReader:
+    # Stands in for easyocr.Reader: records the crops it is asked to detect
+    def __init__(self):
+        self.crops = []
+
+    def detect(self, crop):
+        self.crops.append(crop.shape)
+        h, w = crop.shape[:2]
+        return [[[0, w, 0, h]]], [[]]
+
+    def recognize(self, gray, horizontal_list, free_list, batch_size):
+        return [(box, "text", 0.9) for box in horizontal_list]
+
+
+def contains(region, x, y):
+    x1, y1, x2, y2 = region
+    return x1 <= x < x2 and y1 <= y < y2
+
+
+@pytest.mark.parametrize("text", ["A", "B", "Z", "7", "I", "10", "OX"])
+@pytest.mark.parametrize("scale", [2, 4, 8])
+def test_short_cards_are_text(card, text, scale):
+    for seed in range(3):
+        regions = text_candidates(card(text, seed, scale))
+        assert regions and contains(regions[0], 320, 240)
+
+
+def test_words_give_one_line_region(card):
+    regions = text_candidates(card("HELLO", 0, 2))
+    assert len(regions) == 1 and contains(regions[0], 320, 240)
+
+
+def test_blank_frame_has_no_text():
+    rng = np.random.RandomState(0)
+    blank = np.clip(235 + rng.randint(-8, 9, (480, 640, 3)), 0, 255)
+    assert text_candidates(blank.astype(np.uint8)) == []
+
+
+def test_read_text_detects_in_the_region_only(card):
+    reader = RecordingReader()
+    found = read_text(reader, card("A", 0, 4))
+    assert len(reader.crops) == 1
+    assert reader.crops[0][0] < 480 and reader.crops[0][1] < 640
+    assert [text for _, text, _ in found] == ["text"]
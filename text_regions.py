@@ -0,0 +1,182 @@
+import cv2
+import numpy as np
+
+from metrics import metrics
+
+
+# ================= TEXT REGION PREFILTER =================
+# Full-frame readtext() runs EasyOCR's CRAFT detector over every pixel and
+# then recognizes each box one at a time. Most captures have text in a
+# few small parts of the frame, or none at all, so instead:
+#
+#   1. MSER on a small grayscale copy finds character-like blobs, which
+#      are grouped into line / word regions: blobs of similar height that
+#      sit side by side. A line of one or two glyphs (a letter or number
+#      card) only counts when they are large, so specks of clutter don't;
+#      no regions means no text and OCR is skipped entirely.
+#   2. EasyOCR's detector runs on each region crop, not the whole frame.
+#   3. Recognition runs once, batched, on the boxes found in all regions.
+#
+# read_text() returns the same (bbox, text, conf) tuples as readtext().
+
+PREFILTER_WIDTH = 320
+MAX_REGIONS = 12
+# Above this share of the frame the regions are mostly clutter and one
+# full-frame detector pass is cheaper than many crops
+MAX_REGION_AREA = 0.6
+# Lines with fewer glyphs than this must be at least MIN_GLYPH_HEIGHT of
+# the frame tall to count as text
+LINE_GLYPHS = 3
+MIN_GLYPH_HEIGHT = 0.08
+
+
+def _glyph_boxes(small):
+    # (x, y, w, h) of character-like MSER blobs in `small`
+    sh, sw = small.shape
+    # min_diversity stays 0: anything higher prunes every threshold of a
+    # large, thick-stroked letter. The duplicates are removed below
+    mser = cv2.MSER_create(delta=5, min_area=20, max_area=int(sh * sw * 0.1),
+                           max_variation=0.5, min_diversity=0.0)
+    _, boxes = mser.detectRegions(small)
+    if len(boxes) == 0:
+        return np.zeros((0, 4), np.int64)
+
+    # Keep blobs shaped like glyphs: not too flat, not too tall, not huge
+    boxes = np.asarray(boxes, np.int64).reshape(-1, 4)
+    bw, bh = boxes[:, 2], boxes[:, 3]
+    aspect = bw / np.maximum(bh, 1)
+    boxes = boxes[(aspect > 0.1) & (aspect < 3.0) & (bh > 4) & (bh < sh * 0.7)]
+
+    # MSER reports one glyph at several thresholds, and the holes of
+    # letters like O and B: keep only boxes not inside another one
+    key = (boxes[:, 0] << 48) | (boxes[:, 1] << 32) | (boxes[:, 2] << 16) | boxes[:, 3]
+    boxes = boxes[np.unique(key, return_index=True)[1]]
+    x1, y1 = boxes[:, 0], boxes[:, 1]
+    x2, y2 = x1 + boxes[:, 2], y1 + boxes[:, 3]
+    inside = ((x1[:, None] >= x1[None, :]) & (y1[:, None] >= y1[None, :]) &
+              (x2[:, None] <= x2[None, :]) & (y2[:, None] <= y2[None, :]))
+    np.fill_diagonal(inside, False)
+    return boxes[~inside.any(axis=1)]
+
+
+def _group_lines(glyphs):
+    # Label per glyph: neighbours of similar height, on the same line and
+    # at most about a character apart share a label
+    x, y, w, h = (glyphs[:, i].astype(np.float32) for i in range(4))
+    cy = y + h / 2
+    low = np.minimum(h[:, None], h[None, :])
+    high = np.maximum(h[:, None], h[None, :])
+    gap = (np.maximum(x[:, None], x[None, :]) -
+           np.minimum(x[:, None] + w[:, None], x[None, :] + w[None, :]))
+    linked = ((high < 1.5 * low) & (np.abs(cy[:, None] - cy[None, :]) < 0.4 * low) &
+              (gap < 1.2 * high) & (gap > -0.3 * low))
+
+    # Union-find over the linked pairs
+    parent = list(range(len(glyphs)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in zip(*np.nonzero(np.triu(linked, 1))):
+        ri, rj = find(i), find(j)
+        if ri != rj:
+            parent[ri] = rj
+    return np.array([find(i) for i in range(len(glyphs))])
+
+
+def text_candidates(frame, width=PREFILTER_WIDTH, min_blobs=1,
+                    min_height=MIN_GLYPH_HEIGHT, max_regions=MAX_REGIONS):
+    # Returns a list of (x1, y1, x2, y2) text regions in frame pixels, most
+    # glyphs first; empty if nothing looks like text
+    gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    h, w = gray.shape
+    scale = min(1.0, width / float(w))
+    small = cv2.resize(gray, (int(w * scale), int(h * scale)),
+                       interpolation=cv2.INTER_AREA) if scale < 1.0 else gray
+
+    glyphs = _glyph_boxes(small)
+    if len(glyphs) < min_blobs:
+        return []
+
+    labels = _group_lines(glyphs)
+    x1, y1 = glyphs[:, 0], glyphs[:, 1]
+    x2, y2 = x1 + glyphs[:, 2], y1 + glyphs[:, 3]
+    lines = []
+    for label in np.unique(labels):
+        m = labels == label
+        n = int(m.sum())
+        if n < min_blobs:
+            continue
+        if n < LINE_GLYPHS and glyphs[m, 3].max() < min_height * small.shape[0]:
+            continue
+        lines.append((n, x1[m].min(), y1[m].min(), x2[m].max(), y2[m].max()))
+    lines.sort(reverse=True)
+
+    # Back to full resolution, with a margin of half a line height
+    regions = []
+    for _, lx1, ly1, lx2, ly2 in lines[:max_regions]:
+        pad = 0.5 * (ly2 - ly1)
+        regions.append((int(max(0, (lx1 - pad) / scale)),
+                        int(max(0, (ly1 - pad) / scale)),
+                        int(min(w, (lx2 + pad) / scale)),
+                        int(min(h, (ly2 + pad) / scale))))
+    regions = _merge_overlapping(regions)
+
+    area = sum((rx2 - rx1) * (ry2 - ry1) for rx1, ry1, rx2, ry2 in regions)
+    if len(lines) > max_regions or area > MAX_REGION_AREA * w * h:
+        return [(0, 0, w, h)]
+    return regions
+
+
+def _merge_overlapping(regions):
+    # Union boxes that overlap until none do, so no text is read twice
+    regions = [list(r) for r in regions]
+    merged = True
+    while merged:
+        merged = False
+        out = []
+        for r in regions:
+            for o in out:
+                if r[0] < o[2] and o[0] < r[2] and r[1] < o[3] and o[1] < r[3]:
+                    o[:] = [min(o[0], r[0]), min(o[1], r[1]),
+                            max(o[2], r[2]), max(o[3], r[3])]
+                    merged = True
+                    break
+            else:
+                out.append(r)
+        regions = out
+    return [tuple(r) for r in regions]
+
+
+def read_text(reader, frame, prefilter=True, skip_empty=True, batch_size=8):
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    h, w = gray.shape
+
+    regions = [(0, 0, w, h)]
+    if prefilter:
+        with metrics.timer("ocr_prefilter"):
+            found = text_candidates(gray)
+        if found:
+            regions = found
+        elif skip_empty:
+            return []
+
+    # Stage 2: detector on each candidate region, boxes shifted back into
+    # full-frame coordinates
+    horizontal, free = [], []
+    with metrics.timer("ocr_detect"):
+        for x1, y1, x2, y2 in regions:
+            hz, fr = reader.detect(frame[y1:y2, x1:x2])
+            horizontal += [[bx1 + x1, bx2 + x1, by1 + y1, by2 + y1]
+                           for bx1, bx2, by1, by2 in hz[0]]
+            free += [[[px + x1, py + y1] for px, py in poly] for poly in fr[0]]
+    if not horizontal and not free:
+        return []
+
+    # Stage 3: one batched recognition pass over every box
+    with metrics.timer("ocr_recognize"):
+        return reader.recognize(gray, horizontal_list=horizontal,
+                                free_list=free, batch_size=batch_size)
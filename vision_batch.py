@@ -0,0 +1,104 @@
+import os
+
+import cv2
+
+from metrics import metrics
+
+# Google Vision accepts at most 16 images per batch_annotate_images call
+MAX_BATCH = 16
+
+# The Vision SDK takes most of a second to import on a Pi, so it is only
+# imported once a client is made or a request is built, never at startup
+# (OFFLINE mode may never touch it)
+
+
+def _features():
+    from google.cloud import vision
+    return [
+        vision.Feature(type_=vision.Feature.Type.OBJECT_LOCALIZATION),
+        vision.Feature(type_=vision.Feature.Type.TEXT_DETECTION),
+    ]
+
+
+# ================= CLIENT =================
+# VISION_ENDPOINT points the client at a local stub (see
+# fake_vision_server.py) so the online path can run without credentials.
+def make_client(endpoint=None):
+    from google.cloud import vision
+
+    endpoint = endpoint or os.environ.get("VISION_ENDPOINT")
+    if not endpoint:
+        return vision.ImageAnnotatorClient()
+
+    from google.api_core.client_options import ClientOptions
+    from google.auth.credentials import AnonymousCredentials
+
+    return vision.ImageAnnotatorClient(
+        credentials=AnonymousCredentials(),
+        transport="rest",
+        client_options=ClientOptions(api_endpoint=endpoint),
+    )
+
+
+# ================= ENCODING =================
+def encode_image(frame, quality=85, max_side=None):
+    # Returns (jpeg_bytes, scale) where scale maps original -> uploaded pixels
+    h, w = frame.shape[:2]
+    scale = 1.0
+    if max_side and max(h, w) > max_side:
+        scale = max_side / float(max(h, w))
+        frame = cv2.resize(frame, (int(w * scale), int(h * scale)),
+                           interpolation=cv2.INTER_AREA)
+
+    with metrics.timer("jpeg_encode"):
+        ok, buf = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+    if not ok:
+        raise ValueError("JPEG encoding failed")
+    return buf.tobytes(), scale
+
+
+# ================= ANNOTATE =================
+class VisionResult:
+    __slots__ = ("objects", "texts", "scale")
+
+    def __init__(self, objects, texts, scale):
+        self.objects = objects    # localized_object_annotations
+        self.texts = texts        # text_annotations (full text first)
+        self.scale = scale        # divide text vertices by this
+
+
+def annotate_many(client, frames, quality=85, max_side=None):
+    # One batch_annotate_images round-trip per MAX_BATCH frames, with
+    # object localization and OCR requested together for every image
+    from google.cloud import vision
+
+    features = _features()
+    results = []
+    for start in range(0, len(frames), MAX_BATCH):
+        chunk = frames[start:start + MAX_BATCH]
+        requests = []
+        scales = []
+        for frame in chunk:
+            content, scale = encode_image(frame, quality, max_side)
+            requests.append(vision.AnnotateImageRequest(
+                image=vision.Image(content=content),
+                features=features,
+            ))
+            scales.append(scale)
+
+        with metrics.timer("vision_request"):
+            response = client.batch_annotate_images(requests=requests)
+
+        for res, scale in zip(response.responses, scales):
+            if res.error.message:
+                raise RuntimeError(f"Vision API error: {res.error.message}")
+            results.append(VisionResult(
+                res.localized_object_annotations,
+                res.text_annotations,
+                scale,
+            ))
+    return results
+
+
+def annotate(client, frame, quality=85, max_side=None):
+    return annotate_many(client, [frame], quality, max_side)[0]